@@ -0,0 +1,6 @@
+python3 src/bench_suite.py "$@"
+python3 src/bench_parallel.py
+python3 src/bench_inline.py
+python3 src/bench_links.py
+python3 src/bench_nodes.py
+python3 src/bench_startup.py
@@ -0,0 +1,78 @@
+import json
+import os
+
+from manifest import hash_file
+from static_sync import collect_file_jobs
+
+FINGERPRINT_LENGTH = 8
+
+def fingerprint_name(relative, digest):
+  # images/tom.png -> images/tom.<hash>.png
+  directory, name = os.path.split(relative)
+  stem, extension = os.path.splitext(name)
+  return os.path.join(directory, f"{stem}.{digest[:FINGERPRINT_LENGTH]}{extension}").replace(os.sep, "/")
+
+
+class HashCache:
+  # Digests of static files keyed by path, reused while a file keeps the size
+  # and mtime it had when it was hashed
+  def __init__(self, path):
+    self.path = path
+    try:
+      with open(path, "r") as f:
+        self.entries = json.load(f)
+    except (OSError, ValueError):
+      self.entries = {}
+    self.used = {}
+
+  def hash(self, path):
+    stat = os.stat(path)
+    signature = [stat.st_size, stat.st_mtime_ns]
+    entry = self.entries.get(path)
+    if entry is not None and entry[:2] == signature:
+      digest = entry[2]
+    else:
+      digest = hash_file(path)
+    self.used[path] = signature + [digest]
+    return digest
+
+  def save(self):
+    # Only the files hashed by this build are kept, so deleted files drop out
+    if self.used == self.entries:
+      return
+    directory = os.path.dirname(self.path)
+    if directory and not os.path.exists(directory):
+      os.makedirs(directory)
+    tmp_path = self.path + ".tmp"
+    with open(tmp_path, "w") as f:
+      json.dump(self.used, f, separators=(",", ":"))
+    os.replace(tmp_path, self.path)
+
+
+def fingerprint_assets(static_dir, hash_cache):
+  # Returns the asset map ({static-relative path: fingerprinted path}, "/"
+  # separated) and the digest of every static file keyed by its normalized path
+  assets = {}
+  digests = {}
+  jobs = collect_file_jobs(static_dir, static_dir) if os.path.isdir(static_dir) else []
+  for source_path, _ in jobs:
+    digest = hash_cache.hash(source_path)
+    relative = os.path.relpath(source_path, static_dir).replace(os.sep, "/")
+    assets[relative] = fingerprint_name(relative, digest)
+    digests[os.path.normpath(source_path)] = digest
+  return assets, digests
+
+def write_asset_manifest(path, assets):
+  # Left untouched when the map is unchanged, so deploys see no new file
+  data = json.dumps(assets, indent=2, sort_keys=True)
+  try:
+    with open(path, "r") as f:
+      if f.read() == data:
+        return
+  except OSError:
+    pass
+  os.makedirs(os.path.dirname(path), exist_ok=True)
+  tmp_path = path + ".tmp"
+  with open(tmp_path, "w") as f:
+    f.write(data)
+  os.replace(tmp_path, path)
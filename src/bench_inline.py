@@ -0,0 +1,23 @@
+import argparse
+import timeit
+
+from corpus import make_paragraph
+from splitter import INLINE_TOKENIZERS
+
+def main():
+  parser = argparse.ArgumentParser(description="Compare the inline tokenizers on synthetic paragraphs.")
+  parser.add_argument("--words", type=int, nargs="+", default=[100, 1000, 10000])
+  parser.add_argument("--density", type=float, default=0.2, help="fraction of words carrying inline markup")
+  parser.add_argument("--repeat", type=int, default=5)
+  args = parser.parse_args()
+
+  print(f"{'words':>8} " + " ".join(f"{name:>12}" for name in INLINE_TOKENIZERS))
+  for words in args.words:
+    text = make_paragraph(words, args.density)
+    timings = []
+    for tokenize in INLINE_TOKENIZERS.values():
+      timings.append(min(timeit.repeat(lambda: tokenize(text), number=1, repeat=args.repeat)))
+    print(f"{words:>8} " + " ".join(f"{seconds * 1000:>10.2f}ms" for seconds in timings))
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,38 @@
+import argparse
+import timeit
+
+from splitter import split_nodes_image, split_nodes_link, text_to_textnodes_scanner
+from textnode import TextNode, TextType
+
+def make_link_paragraph(links):
+  # Every fourth reference is an image; names and URLs repeat and carry
+  # regex metacharacters, which the old per-match re-split choked on.
+  parts = []
+  for idx in range(links):
+    if idx % 4 == 3:
+      parts.append(f"![pic {idx % 10}](/images/{idx % 10}.png)")
+    else:
+      parts.append(f"see [page {idx % 10}](/blog/{idx % 10}?q=a+b*) here")
+  return " ".join(parts)
+
+def split_images_and_links(text):
+  return split_nodes_link(split_nodes_image([TextNode(text, TextType.TEXT)]))
+
+def main():
+  parser = argparse.ArgumentParser(description="Time image/link extraction on link-dense paragraphs.")
+  parser.add_argument("--links", type=int, nargs="+", default=[1000, 2000, 4000, 8000, 16000])
+  parser.add_argument("--repeat", type=int, default=5)
+  args = parser.parse_args()
+
+  engines = {"split_nodes": split_images_and_links, "scanner": text_to_textnodes_scanner}
+  print(f"{'links':>8} " + " ".join(f"{name:>12} {'per link':>10}" for name in engines))
+  for links in args.links:
+    text = make_link_paragraph(links)
+    cells = []
+    for run in engines.values():
+      seconds = min(timeit.repeat(lambda: run(text), number=1, repeat=args.repeat))
+      cells.append(f"{seconds * 1000:>10.2f}ms {seconds / links * 1e6:>8.2f}us")
+    print(f"{links:>8} " + " ".join(cells))
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,61 @@
+import argparse
+import time
+import tracemalloc
+
+from htmlnode import LeafNode, ParentNode
+from textnode import TextNode, TextType
+
+
+# Subclasses without __slots__ get a per-instance __dict__ again, which makes
+# them a faithful stand-in for the node classes before they were slotted.
+class DictTextNode(TextNode):
+  pass
+
+class DictLeafNode(LeafNode):
+  pass
+
+class DictParentNode(ParentNode):
+  pass
+
+
+def make_text_nodes(cls, count):
+  return [cls("word", TextType.BOLD) for _ in range(count)]
+
+def make_leaf_nodes(cls, count):
+  return [cls("b", "word") for _ in range(count)]
+
+def make_parent_nodes(cls, count):
+  children = [LeafNode(None, "word")]
+  return [cls("li", children) for _ in range(count)]
+
+def measure(factory, cls, count):
+  tracemalloc.start()
+  nodes = factory(cls, count)
+  allocated = tracemalloc.get_traced_memory()[0]
+  tracemalloc.stop()
+  del nodes
+
+  start = time.perf_counter()
+  nodes = factory(cls, count)
+  elapsed = time.perf_counter() - start
+  del nodes
+  return allocated / count, count / elapsed
+
+def main():
+  parser = argparse.ArgumentParser(description="Measure memory and construction rate of node classes.")
+  parser.add_argument("--count", type=int, default=200000)
+  args = parser.parse_args()
+
+  cases = [
+    ("TextNode", make_text_nodes, DictTextNode, TextNode),
+    ("LeafNode", make_leaf_nodes, DictLeafNode, LeafNode),
+    ("ParentNode", make_parent_nodes, DictParentNode, ParentNode),
+  ]
+  print(f"{'class':<12} {'dict B/node':>12} {'slots B/node':>13} {'dict nodes/s':>14} {'slots nodes/s':>14}")
+  for name, factory, dict_cls, slotted_cls in cases:
+    dict_bytes, dict_rate = measure(factory, dict_cls, args.count)
+    slot_bytes, slot_rate = measure(factory, slotted_cls, args.count)
+    print(f"{name:<12} {dict_bytes:>12.1f} {slot_bytes:>13.1f} {dict_rate:>14.0f} {slot_rate:>14.0f}")
+
+if __name__ == "__main__":
+  main()
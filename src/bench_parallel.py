@@ -0,0 +1,56 @@
+import argparse
+import filecmp
+import os
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+
+import config
+from corpus import generate_corpus
+from page_generator import collect_page_jobs, generate_pages
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def time_build(content_dir, template_path, dest_dir, workers):
+  jobs = collect_page_jobs(content_dir, dest_dir)
+  start = time.perf_counter()
+  with redirect_stdout(StringIO()):
+    errors = generate_pages(jobs, template_path, workers)
+  elapsed = time.perf_counter() - start
+  if errors:
+    raise RuntimeError(f"{len(errors)} page(s) failed, first: {errors[0]}")
+  return len(jobs), elapsed
+
+def same_tree(left, right):
+  comparison = filecmp.dircmp(left, right)
+  if comparison.left_only or comparison.right_only or comparison.funny_files:
+    return False
+  _, mismatch, errors = filecmp.cmpfiles(left, right, comparison.common_files, shallow=False)
+  if mismatch or errors:
+    return False
+  return all(same_tree(os.path.join(left, d), os.path.join(right, d)) for d in comparison.common_dirs)
+
+def main():
+  parser = argparse.ArgumentParser(description="Compare serial and parallel page generation.")
+  parser.add_argument("--pages", type=int, default=1000, help="number of synthetic pages to generate")
+  parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+  args = parser.parse_args()
+
+  config.basepath = "/"
+  template_path = os.path.join(REPO_ROOT, "template.html")
+  with tempfile.TemporaryDirectory() as tmp:
+    content_dir = os.path.join(tmp, "content")
+    generate_corpus(content_dir, args.pages)
+
+    pages, serial = time_build(content_dir, template_path, os.path.join(tmp, "serial"), 1)
+    _, parallel = time_build(content_dir, template_path, os.path.join(tmp, "parallel"), args.workers)
+
+    print(f"pages:    {pages}")
+    print(f"serial:   {serial:.3f}s ({pages / serial:.0f} pages/s)")
+    print(f"parallel: {parallel:.3f}s ({pages / parallel:.0f} pages/s, {args.workers} workers)")
+    print(f"speedup:  {serial / parallel:.2f}x")
+    print(f"identical output: {same_tree(os.path.join(tmp, 'serial'), os.path.join(tmp, 'parallel'))}")
+
+if __name__ == "__main__":
+  main()
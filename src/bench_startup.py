@@ -0,0 +1,50 @@
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from corpus import generate_corpus
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(REPO_ROOT, "src", "main.py")
+
+def time_command(argv, repeat, before=None):
+  timings = []
+  for _ in range(repeat):
+    if before:
+      before()
+    start = time.perf_counter()
+    subprocess.run(argv, check=True, stdout=subprocess.DEVNULL)
+    timings.append(time.perf_counter() - start)
+  return min(timings)
+
+def main():
+  parser = argparse.ArgumentParser(description="Time generator start-up on an already built site.")
+  parser.add_argument("--pages", type=int, default=500)
+  parser.add_argument("--repeat", type=int, default=10)
+  args = parser.parse_args()
+
+  with tempfile.TemporaryDirectory() as tmp:
+    basepath = tmp + os.sep
+    paths = generate_corpus(os.path.join(tmp, "content"), args.pages)
+    shutil.copytree(os.path.join(REPO_ROOT, "static"), os.path.join(tmp, "static"))
+    shutil.copy(os.path.join(REPO_ROOT, "template.html"), os.path.join(tmp, "template.html"))
+    subprocess.run([sys.executable, MAIN, basepath], check=True, stdout=subprocess.DEVNULL)
+
+    # Touching a source defeats the no-op check without giving any page new content
+    touch = lambda: os.utime(paths[0])
+    results = {
+      "interpreter": time_command([sys.executable, "-c", "pass"], args.repeat),
+      "no-op": time_command([sys.executable, MAIN, basepath], args.repeat),
+      "touched source": time_command([sys.executable, MAIN, basepath], args.repeat, touch),
+    }
+
+  print(f"{args.pages} pages, best of {args.repeat}")
+  for name, seconds in results.items():
+    print(f"{name:<16} {seconds * 1000:>8.1f}ms")
+
+if __name__ == "__main__":
+  main()
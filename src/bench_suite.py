@@ -0,0 +1,131 @@
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+
+import config
+import main as site_main
+from corpus import DEFAULT_BLOCK_MIX, generate_corpus, make_paragraph, parse_block_mix
+from htmlnode import markdown_to_html_node
+from splitter import text_to_textnodes
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, config.cache_dir, "bench_baseline.json")
+
+def best_of(repeat, func):
+  timings = []
+  for _ in range(repeat):
+    start = time.perf_counter()
+    func()
+    timings.append(time.perf_counter() - start)
+  return min(timings)
+
+def bench_end_to_end(basepath, workers):
+  # --full does not clear the body cache, so without --no-body-cache every
+  # repeat after the first would time cached bodies instead of rendering
+  argv = [basepath, "--full", "--no-body-cache", "--jobs", str(workers)]
+  with redirect_stdout(StringIO()):
+    site_main.main(argv)
+
+def run_suite(args):
+  block_mix = parse_block_mix(args.mix) if args.mix else DEFAULT_BLOCK_MIX
+  results = {}
+  with tempfile.TemporaryDirectory() as tmp:
+    basepath = tmp + os.sep
+    paths = generate_corpus(os.path.join(tmp, "content"), args.pages, args.blocks, block_mix,
+                            args.density, seed=args.seed)
+    shutil.copytree(os.path.join(REPO_ROOT, "static"), os.path.join(tmp, "static"))
+    shutil.copy(os.path.join(REPO_ROOT, "template.html"), os.path.join(tmp, "template.html"))
+
+    previous_basepath = config.basepath
+    try:
+      results["end_to_end"] = best_of(args.repeat, lambda: bench_end_to_end(basepath, args.jobs))
+    finally:
+      config.basepath = previous_basepath
+
+    documents = []
+    for path in paths:
+      with open(path) as f:
+        documents.append(f.read())
+
+  rng = random.Random(args.seed)
+  paragraphs = [make_paragraph(rng.randint(20, 80), args.density, rng=rng) for _ in range(args.pages * 5)]
+  trees = [markdown_to_html_node(document) for document in documents]
+
+  results["markdown_to_html_node"] = best_of(args.repeat, lambda: [markdown_to_html_node(d) for d in documents])
+  results["text_to_textnodes"] = best_of(args.repeat, lambda: [text_to_textnodes(p) for p in paragraphs])
+  results["to_html"] = best_of(args.repeat, lambda: [tree.to_html() for tree in trees])
+  return results
+
+def suite_parameters(args):
+  return {
+    "pages": args.pages,
+    "blocks": args.blocks,
+    "density": args.density,
+    "mix": args.mix or "",
+    "seed": args.seed,
+    "jobs": args.jobs,
+  }
+
+def compare(results, baseline, threshold):
+  regressions = []
+  print(f"{'benchmark':<24} {'seconds':>10} {'baseline':>10} {'change':>8}")
+  for name, seconds in results.items():
+    base = baseline.get(name)
+    if base:
+      change = seconds / base - 1
+      flag = "  REGRESSION" if change > threshold else ""
+      print(f"{name:<24} {seconds:>10.4f} {base:>10.4f} {change * 100:>7.1f}%{flag}")
+      if flag:
+        regressions.append(name)
+    else:
+      print(f"{name:<24} {seconds:>10.4f} {'-':>10} {'-':>8}")
+  return regressions
+
+def main():
+  parser = argparse.ArgumentParser(description="Benchmark the generator on a synthetic content tree.")
+  parser.add_argument("--pages", type=int, default=200)
+  parser.add_argument("--blocks", type=int, default=20, help="blocks per page")
+  parser.add_argument("--density", type=float, default=0.2, help="fraction of words carrying inline markup")
+  parser.add_argument("--mix", help='block mix weights, e.g. "paragraph=5,heading=2,code=1"')
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--jobs", type=int, default=1, help="worker processes for the end-to-end build")
+  parser.add_argument("--repeat", type=int, default=3)
+  parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="JSON file holding stored results")
+  parser.add_argument("--save", action="store_true", help="store these results as the new baseline")
+  parser.add_argument("--threshold", type=float, default=0.10,
+                      help="fractional slowdown against the baseline that counts as a regression")
+  args = parser.parse_args()
+
+  results = run_suite(args)
+  parameters = suite_parameters(args)
+  print(f"{args.pages} pages, end-to-end {args.pages / results['end_to_end']:.0f} pages/s")
+
+  baseline = {}
+  if os.path.exists(args.baseline):
+    with open(args.baseline) as f:
+      stored = json.load(f)
+    if stored.get("parameters") == parameters:
+      baseline = stored.get("results", {})
+    else:
+      print("Stored baseline was recorded with different parameters; not comparing")
+  regressions = compare(results, baseline, args.threshold)
+
+  if args.save:
+    os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+    with open(args.baseline, "w") as f:
+      json.dump({"parameters": parameters, "results": results}, f, indent=2)
+    print(f"Saved baseline to {args.baseline}")
+
+  if regressions and not args.save:
+    print(f"Regressed beyond {args.threshold * 100:.0f}%: {', '.join(regressions)}")
+    sys.exit(1)
+
+if __name__ == "__main__":
+  main()
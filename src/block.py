@@ -1,4 +1,5 @@
 from enum import Enum
+from profiler import profiled
 
 class BlockType(Enum):
     PARAGRAPH = "paragraph"
@@ -12,24 +13,60 @@ def count_starting_hashes(markdown: str) -> int:
   stripped = markdown.lstrip('#')
   return len(markdown) - len(stripped)
 
-def block_to_block_type(markdown):
-  if markdown.startswith("```\n") and markdown.endswith("\n```"):
+@profiled("classify")
+def classify_lines(lines):
+  # lines are the block's lines, already free of surrounding whitespace
+  first = lines[0]
+  if len(lines) > 1 and first == "```" and lines[-1] == "```":
     return BlockType.CODE
 
-  hash_count = count_starting_hashes(markdown)
+  hash_count = count_starting_hashes(first)
   if hash_count >= 1 and hash_count <= 6:
     return BlockType.HEADING
 
-  lines = markdown.split("\n")
-  if all([line.startswith(">") for line in lines]):
-    return BlockType.QUOTE
+  # One pass decides quote, unordered and ordered lists together
+  quote = unordered = ordered = True
+  for number, line in enumerate(lines, 1):
+    quote = quote and line.startswith(">")
+    unordered = unordered and line.startswith("- ")
+    ordered = ordered and line.startswith(f"{number}. ")
+    if not (quote or unordered or ordered):
+      return BlockType.PARAGRAPH
 
-  if all([line.startswith("- ") for line in lines]):
+  if quote:
+    return BlockType.QUOTE
+  if unordered:
     return BlockType.UNORDERED_LIST
+  return BlockType.ORDERED_LIST
 
-  expected_number = 1
+def block_to_block_type(markdown):
+  return classify_lines(markdown.split("\n"))
+
+def finish_block(lines):
+  lines[0] = lines[0].lstrip()
+  lines[-1] = lines[-1].rstrip()
+  return classify_lines(lines), lines
+
+def iter_blocks(lines):
+  # Consume an iterable of lines (a list or an open file) and yield
+  # (block_type, block_lines) for every block. Lines holding only whitespace
+  # separate blocks, except inside a ``` fence where they belong to the code,
+  # and "\r\n" line endings are accepted.
+  block = []
+  fenced = False
   for line in lines:
-    if not line.startswith(f"{expected_number}. "):
-      return BlockType.PARAGRAPH
-    expected_number += 1
-  return BlockType.ORDERED_LIST
+    line = line.rstrip("\r\n")
+    stripped = line.strip()
+    if stripped.startswith("```") and stripped.count("```") == 1:
+      fenced = not fenced
+    if fenced or stripped:
+      block.append(line)
+    elif block:
+      yield finish_block(block)
+      block = []
+  if block:
+    yield finish_block(block)
+
+@profiled("blocks")
+def scan_blocks(markdown):
+  return list(iter_blocks(markdown.split("\n")))
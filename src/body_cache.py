@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+import tempfile
+import zlib
+
+import config
+from urls import resolver_for
+
+# Bump whenever parsing or serialization changes the HTML produced for a page
+PARSER_VERSION = 4
+
+
+class BodyCache:
+  def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+    self.directory = directory
+    self.max_bytes = max_bytes
+
+  def key(self, markdown):
+    digest = hashlib.sha256()
+    # Bodies carry resolved URLs, so they depend on how the resolver maps them
+    resolver = resolver_for(config.basepath, config.assets)
+    digest.update(f"{PARSER_VERSION}:{config.inline_tokenizer}:{resolver.key}\0".encode())
+    digest.update(markdown.encode())
+    return digest.hexdigest()
+
+  def entry_path(self, key):
+    return os.path.join(self.directory, key[:2], key)
+
+  def get(self, key):
+    path = self.entry_path(key)
+    try:
+      with open(path, "rb") as f:
+        data = zlib.decompress(f.read()).decode()
+      title, references, body = data.split("\n", 2)
+      references = [tuple(reference) for reference in json.loads(references)]
+      # Refresh the mtime so pruning evicts the least recently used entries
+      os.utime(path)
+    except (OSError, zlib.error, ValueError):
+      return None
+    return title, body, references
+
+  def put(self, key, title, body, references=()):
+    # references are the (attribute, url) pairs of the body's links and images
+    path = self.entry_path(key)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # Write to a private temporary file and rename it into place, so a
+    # concurrent build never reads a partially written entry.
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+      with os.fdopen(fd, "wb") as f:
+        entry = f"{title}\n{json.dumps(sorted(references))}\n{body}"
+        f.write(zlib.compress(entry.encode(), 1))
+      os.replace(tmp_path, path)
+    except BaseException:
+      try:
+        os.remove(tmp_path)
+      except FileNotFoundError:
+        pass
+      raise
+
+  def prune(self):
+    entries = []
+    total = 0
+    for root, _, files in os.walk(self.directory):
+      for name in files:
+        path = os.path.join(root, name)
+        try:
+          stat = os.stat(path)
+        except FileNotFoundError:
+          continue
+        entries.append((stat.st_mtime_ns, stat.st_size, path))
+        total += stat.st_size
+
+    removed = 0
+    for _, size, path in sorted(entries):
+      if total <= self.max_bytes:
+        break
+      try:
+        os.remove(path)
+        removed += 1
+      except FileNotFoundError:
+        # Another build evicted it first
+        pass
+      total -= size
+    return removed
@@ -1 +1,7 @@
 basepath = "/"
+cache_dir = ".ssg-cache"
+inline_tokenizer = "scanner"
+# Static files (relative to static/) mapped to their fingerprinted names, or None
+assets = None
+# Markdown sources at least this many bytes are rendered block by block
+stream_threshold = 8 * 1024 * 1024
@@ -0,0 +1,97 @@
+import os
+import random
+
+WORDS = ["middle", "earth", "ring", "hobbit", "elf", "wizard", "river", "tower", "shire", "road",
+         "mountain", "forest", "king", "sword", "fellowship", "dragon", "gate", "lamp", "song", "star"]
+
+# Images shipped in static/, so synthetic pages only reference files a build has
+IMAGES = ["/images/tom.png", "/images/rivendell.png", "/images/tolkien.png", "/images/glorfindel.png"]
+
+DEFAULT_BLOCK_MIX = {
+  "paragraph": 5,
+  "heading": 2,
+  "unordered_list": 2,
+  "ordered_list": 1,
+  "code": 1,
+  "quote": 1,
+}
+
+def parse_block_mix(spec):
+  # "paragraph=5,code=1" -> {"paragraph": 5, "code": 1}
+  mix = {}
+  for item in spec.split(","):
+    kind, _, weight = item.partition("=")
+    if kind.strip() not in DEFAULT_BLOCK_MIX:
+      raise ValueError(f"Unknown block kind: {kind.strip()}")
+    mix[kind.strip()] = float(weight or 1)
+  return mix
+
+def page_url(idx, fanout):
+  return "/" if idx == 0 else f"/section{idx % fanout}/page{idx}"
+
+def make_paragraph(words, inline_density, seed=0, rng=None, links=("/",)):
+  # links are the URLs of pages that exist, for the paragraph's links to point at
+  rng = rng or random.Random(seed)
+  parts = []
+  # Link fragments are numbered so every link in a page is distinct
+  for idx in range(words):
+    word = rng.choice(WORDS)
+    roll = rng.random()
+    if roll < inline_density / 5:
+      parts.append(f"**{word}**")
+    elif roll < 2 * inline_density / 5:
+      parts.append(f"_{word}_")
+    elif roll < 3 * inline_density / 5:
+      parts.append(f"`{word}`")
+    elif roll < 4 * inline_density / 5:
+      parts.append(f"[{word}]({rng.choice(links)}#{word}{idx})")
+    elif roll < inline_density:
+      parts.append(f"![{word}]({rng.choice(IMAGES)})")
+    else:
+      parts.append(word)
+  return " ".join(parts)
+
+def make_block(kind, inline_density, rng, links=("/",)):
+  match kind:
+    case "paragraph":
+      return make_paragraph(rng.randint(20, 80), inline_density, rng=rng, links=links)
+    case "heading":
+      return "#" * rng.randint(2, 4) + " " + make_paragraph(rng.randint(2, 6), inline_density, rng=rng, links=links)
+    case "unordered_list":
+      return "\n".join("- " + make_paragraph(rng.randint(3, 12), inline_density, rng=rng, links=links)
+                       for _ in range(rng.randint(2, 8)))
+    case "ordered_list":
+      return "\n".join(f"{idx}. " + make_paragraph(rng.randint(3, 12), inline_density, rng=rng, links=links)
+                       for idx in range(1, rng.randint(2, 8) + 1))
+    case "code":
+      lines = [f"{rng.choice(WORDS)} = {rng.randint(0, 999)}" for _ in range(rng.randint(2, 10))]
+      return "```\n" + "\n".join(lines) + "\n```"
+    case "quote":
+      return "\n".join("> " + make_paragraph(rng.randint(5, 15), inline_density, rng=rng, links=links)
+                       for _ in range(rng.randint(1, 4)))
+    case _:
+      raise ValueError(f"Unknown block kind: {kind}")
+
+def make_page(blocks, block_mix, inline_density, rng, links=("/",)):
+  kinds = list(block_mix)
+  weights = [block_mix[kind] for kind in kinds]
+  title = " ".join(rng.choice(WORDS) for _ in range(4)).title()
+  body = [make_block(kind, inline_density, rng, links) for kind in rng.choices(kinds, weights, k=blocks)]
+  return "\n\n".join([f"# {title}"] + body) + "\n"
+
+def generate_corpus(dest_dir, pages, blocks_per_page=20, block_mix=None, inline_density=0.2, fanout=10, seed=0):
+  rng = random.Random(seed)
+  block_mix = block_mix or DEFAULT_BLOCK_MIX
+  links = [page_url(idx, fanout) for idx in range(pages)]
+  paths = []
+  for idx in range(pages):
+    if idx == 0:
+      relative = "index.md"
+    else:
+      relative = os.path.join(f"section{idx % fanout}", f"page{idx}", "index.md")
+    path = os.path.join(dest_dir, relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+      f.write(make_page(blocks_per_page, block_mix, inline_density, rng, links))
+    paths.append(path)
+  return paths
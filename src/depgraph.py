@@ -0,0 +1,57 @@
+import os
+from urllib.parse import urlsplit
+
+# Signatures of a referenced page or static file; only its existence affects
+# the pages that point at it.
+PRESENT = "present"
+MISSING = "missing"
+
+
+def resolve_reference(url, content_dir, static_dir, root_folder=""):
+  # Takes a URL as it appears in a rendered page, already resolved under the
+  # root folder: root/static/x is served from static/x and any other root/x
+  # is the page built from content/x. Returns the candidate input paths, or
+  # [] for URLs pointing outside the site.
+  parts = urlsplit(url)
+  if parts.scheme or parts.netloc or not parts.path.startswith(root_folder + "/"):
+    return []
+  relative = parts.path[len(root_folder) + 1:]
+  if relative.startswith("static/"):
+    return [os.path.normpath(os.path.join(static_dir, relative[len("static/"):]))]
+
+  relative = relative.rstrip("/")
+  if relative.endswith(".html"):
+    relative = relative[:-len(".html")]
+  if not relative or relative == "index":
+    return [os.path.normpath(os.path.join(content_dir, "index.md"))]
+  return [os.path.normpath(os.path.join(content_dir, relative, "index.md")),
+          os.path.normpath(os.path.join(content_dir, relative + ".md"))]
+
+
+class DependencyGraph:
+  def __init__(self, edges=None):
+    # output path -> {input path: signature of that input when the output was built}
+    self.edges = edges if edges is not None else {}
+
+  @classmethod
+  def from_pages(cls, pages):
+    return cls({entry["output"]: entry["inputs"] for entry in pages.values() if "inputs" in entry})
+
+  def dependents(self, input_path):
+    return sorted(output for output, inputs in self.edges.items() if input_path in inputs)
+
+  def is_stale(self, output, hashes, exists):
+    # Content inputs (the page's source and the template) are recorded by hash
+    # and looked up in hashes; referenced pages and static files only by
+    # whether exists(path) holds.
+    inputs = self.edges.get(output)
+    if not inputs:
+      return True
+    for path, recorded in inputs.items():
+      if recorded in (PRESENT, MISSING):
+        current = PRESENT if exists(path) else MISSING
+      else:
+        current = hashes.get(path)
+      if current != recorded:
+        return True
+    return False
@@ -0,0 +1,27 @@
+import os
+import tempfile
+import unittest
+
+
+class TempDirTestCase(unittest.TestCase):
+  # Runs each test in a fresh temporary directory. path(), write() and read()
+  # take paths relative to self.root, the directory itself unless a subclass
+  # points it elsewhere after calling setUp().
+  def setUp(self):
+    self.tmp = tempfile.TemporaryDirectory()
+    self.addCleanup(self.tmp.cleanup)
+    self.root = self.tmp.name
+
+  def path(self, *parts):
+    return os.path.join(self.root, *parts)
+
+  def write(self, relative, text):
+    path = self.path(relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+      f.write(text)
+    return path
+
+  def read(self, relative):
+    with open(self.path(relative)) as f:
+      return f.read()
@@ -1,13 +1,21 @@
 from enum import Enum
 from textnode import TextType, TextNode
-from splitter import markdown_to_blocks, text_to_textnodes
-from block import block_to_block_type, BlockType, count_starting_hashes
+from splitter import text_to_textnodes
+from block import BlockType, count_starting_hashes, iter_blocks, scan_blocks
+from profiler import profiled
+from urls import resolver_for
+import config
+import memo
+from contextlib import contextmanager
 
 class HTMLNodeType(Enum):
   pass
 
 
 class HTMLNode:
+  # Pages create huge numbers of nodes, so avoid a per-instance __dict__
+  __slots__ = ("tag", "value", "children", "props")
+
   def __init__(self, tag=None, value=None, children=None, props=None):
     self.tag = tag
     self.value = value
@@ -17,6 +25,13 @@ class HTMLNode:
   def to_html(self):
     raise NotImplementedError
 
+  def iter_html(self):
+    yield self.to_html()
+
+  def write_html(self, fp):
+    for chunk in self.iter_html():
+      fp.write(chunk)
+
   def props_to_html(self):
     if not self.props:
       return ""
@@ -41,6 +56,8 @@ class HTMLNode:
 
 
 class LeafNode(HTMLNode):
+  __slots__ = ()
+
   def __init__(self, tag, value, props=None):
     super().__init__(tag, value, None, props)
 
@@ -58,10 +75,12 @@ class LeafNode(HTMLNode):
 
 
 class ParentNode(HTMLNode):
+  __slots__ = ()
+
   def __init__(self, tag, children, props=None):
     super().__init__(tag, None, children, props)
 
-  def to_html(self):
+  def validate(self):
     if not self.tag:
       raise ValueError("All parent nodes must have a tag.")
 
@@ -71,7 +90,41 @@ class ParentNode(HTMLNode):
     if self.tag == "img":
       raise ValueError("The parent nodes cannot have an img tag.")
 
-    return f'<{self.tag}{self.props_to_html()}>{"".join([child.to_html() for child in self.children])}</{self.tag}>'
+  def iter_html(self):
+    # Walk the tree with an explicit stack so every fragment is yielded once,
+    # instead of being copied into the string of each enclosing node.
+    stack = [self]
+    while stack:
+      item = stack.pop()
+      if isinstance(item, str):
+        yield item
+      elif isinstance(item, ParentNode):
+        item.validate()
+        yield f'<{item.tag}{item.props_to_html()}>'
+        stack.append(f'</{item.tag}>')
+        stack.extend(reversed(item.children))
+      else:
+        yield item.to_html()
+
+  def to_html(self):
+    return "".join(self.iter_html())
+
+# Receives the (attribute, url) of every link and image node built while a
+# page is rendered; see collecting_references()
+reference_sink = None
+
+@contextmanager
+def collecting_references(references):
+  global reference_sink
+  previous, reference_sink = reference_sink, references
+  try:
+    yield references
+  finally:
+    reference_sink = previous
+
+def record_references(references):
+  if reference_sink is not None:
+    reference_sink.update(references)
 
 def text_node_to_html_node(text_node):
     match text_node.text_type:
@@ -84,44 +137,67 @@ def text_node_to_html_node(text_node):
       case TextType.CODE:
           return LeafNode(tag="code", value=text_node.text)
       case TextType.LINK:
-          return LeafNode(tag="a", value=text_node.text, props={"href": text_node.url})
+          if text_node.url is None:
+              return LeafNode(tag="a", value=text_node.text)
+          href = resolver_for(config.basepath, config.assets).href(text_node.url)
+          record_references((("href", href),))
+          return LeafNode(tag="a", value=text_node.text, props={"href": href})
       case TextType.IMAGE:
-          return LeafNode(tag="img", value="", props={"src": text_node.url, "alt": text_node.text})
+          src = None
+          if text_node.url is not None:
+              src = resolver_for(config.basepath, config.assets).src(text_node.url)
+              record_references((("src", src),))
+          return LeafNode(tag="img", value="", props={"src": src, "alt": text_node.text})
       case _:
           raise ValueError("The text node have a unsupported type.")
 
 def text_to_children(text):
-  textnodes = text_to_textnodes(text)
-  return [text_node_to_html_node(textnode) for textnode in textnodes]
+  table = memo.inline
+  if table is None:
+    textnodes = text_to_textnodes(text)
+    return [text_node_to_html_node(textnode) for textnode in textnodes]
+
+  # Memoized fragments are pre-rendered raw leaves shared between pages,
+  # stored with the references their nodes recorded
+  entry = table.get(text)
+  if entry is None:
+    with collecting_references(set()) as references:
+      html = "".join([text_node_to_html_node(textnode).to_html() for textnode in text_to_textnodes(text)])
+    entry = (LeafNode(tag=None, value=html), tuple(references))
+    table.put(text, entry)
+  record_references(entry[1])
+  return [entry[0]]
 
 def block_to_html_node(block, block_type):
+  return block_lines_to_html_node(block.split("\n"), block_type)
+
+def block_lines_to_html_node(lines, block_type):
   match block_type:
     case BlockType.PARAGRAPH:
-      block = " ".join(block.split("\n"))
-      children = text_to_children(block)
+      children = text_to_children(" ".join(lines))
       return ParentNode(tag="p", children=children)
     case BlockType.HEADING:
-      block = " ".join(block.split("\n"))
+      block = " ".join(lines)
       hash_count = count_starting_hashes(block)
       children = text_to_children(block.lstrip("#").strip())
       return ParentNode(tag=f"h{hash_count}", children=children)
     case BlockType.CODE:
-      code_textnode = TextNode(block.lstrip("```\n").rstrip("```"), TextType.CODE)
+      code_textnode = TextNode("\n".join(lines).lstrip("```\n").rstrip("```"), TextType.CODE)
       code_htmlnode = text_node_to_html_node(code_textnode)
       return ParentNode(tag="pre", children=[code_htmlnode])
     case BlockType.QUOTE:
-      children = text_to_children("\n".join([line.lstrip(">").strip() for line in block.split("\n")]))
+      children = text_to_children("\n".join([line.lstrip(">").strip() for line in lines]))
       return ParentNode(tag="q", children=children)
     case BlockType.UNORDERED_LIST:
       children = []
-      for line in block.split("\n"):
+      for line in lines:
         item_children = text_to_children(line.lstrip("- "))
         children.append(ParentNode(tag="li", children=item_children))
       return ParentNode(tag="ul", children=children)
     case BlockType.ORDERED_LIST:
       children = []
       item_number = 1
-      for line in block.split("\n"):
+      for line in lines:
         item_children = text_to_children(line.lstrip(f"{item_number}. "))
         children.append(ParentNode(tag="li", children=item_children))
         item_number+=1
@@ -129,13 +205,39 @@ def block_to_html_node(block, block_type):
     case _:
       raise ValueError("Given block type is unsupported")
 
+def render_block(lines, block_type):
+  table = memo.blocks
+  if table is None:
+    return block_lines_to_html_node(lines, block_type)
+
+  key = (block_type, "\n".join(lines))
+  entry = table.get(key)
+  if entry is None:
+    with collecting_references(set()) as references:
+      fragment = LeafNode(tag=None, value=block_lines_to_html_node(lines, block_type).to_html())
+    entry = (fragment, tuple(references))
+    table.put(key, entry)
+  record_references(entry[1])
+  return entry[0]
+
+@profiled("tree")
 def markdown_to_html_node(markdown):
-  blocks = markdown_to_blocks(markdown)
   block_nodes = []
-  for block in blocks:
-    block_type = block_to_block_type(block)
-    block_node = block_to_html_node(block, block_type)
+  for block_type, lines in scan_blocks(markdown):
+    block_node = render_block(lines, block_type)
     block_nodes.append(block_node)
   div_parent = ParentNode(tag="div", children=block_nodes)
   return div_parent
 
+def iter_markdown_html(lines):
+  # Streaming counterpart of markdown_to_html_node(...).iter_html(): blocks are
+  # read from an iterable of lines and serialized one at a time, so memory is
+  # bounded by the largest block rather than the document.
+  yield "<div>"
+  empty = True
+  for block_type, block_lines in iter_blocks(lines):
+    empty = False
+    yield from render_block(block_lines, block_type).iter_html()
+  if empty:
+    raise ValueError("All parent nodes must have the children.")
+  yield "</div>"
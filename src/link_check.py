@@ -0,0 +1,48 @@
+import os
+
+from depgraph import resolve_reference
+
+
+class PathIndex:
+  # Every file a site URL can point at, gathered once per build so checking
+  # a reference is a set lookup rather than a stat
+  def __init__(self, paths=()):
+    self.paths = {os.path.normpath(path) for path in paths}
+
+  def add_tree(self, directory):
+    for root, _, files in os.walk(directory):
+      for name in files:
+        self.paths.add(os.path.normpath(os.path.join(root, name)))
+
+  def __contains__(self, path):
+    return path in self.paths
+
+
+class LinkChecker:
+  def __init__(self, index, content_dir, static_dir, root_folder="", aliases=None):
+    self.index = index
+    # Fingerprinted static paths mapped back to the files they were copied from
+    self.aliases = aliases or {}
+    self.content_dir = content_dir
+    self.static_dir = static_dir
+    self.root_folder = root_folder
+    # Pages commonly share their links (navigation, the stylesheet), so each
+    # URL is resolved once
+    self.resolved = {}
+
+  def resolve(self, url):
+    # (candidate input paths, the ones that exist)
+    if url not in self.resolved:
+      candidates = resolve_reference(url, self.content_dir, self.static_dir, self.root_folder)
+      candidates = [self.aliases.get(path, path) for path in candidates]
+      self.resolved[url] = (candidates, [path for path in candidates if path in self.index])
+    return self.resolved[url]
+
+  def broken(self, references):
+    # URLs that point into the site at a page or static file that does not exist
+    broken = set()
+    for _, url in references:
+      candidates, found = self.resolve(url)
+      if candidates and not found:
+        broken.add(url)
+    return sorted(broken)
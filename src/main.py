@@ -1,17 +1,178 @@
-from page_generator import generate_pages_recursive, copy_directory_recursive
-import os 
-import shutil
+import argparse
+import os
 import sys
 import config
+import memo
+import profiler
+import snapshot
+from body_cache import BodyCache, PARSER_VERSION
 
-if len(sys.argv) > 1:
-  config.basepath = sys.argv[1]
+def shard_arg(spec):
+  from sharding import parse_shard
+  try:
+    return parse_shard(spec)
+  except ValueError as e:
+    raise argparse.ArgumentTypeError(str(e))
 
-def main():
-  if os.path.exists(f"{config.basepath}docs"):
-    shutil.rmtree(f"{config.basepath}docs")
-  copy_directory_recursive(f"{config.basepath}static", f"{config.basepath}docs/static")
-  generate_pages_recursive(f"{config.basepath}content", f"{config.basepath}template.html", f"{config.basepath}docs")
+def parse_args(argv):
+  parser = argparse.ArgumentParser(description="Generate the static site into docs/.")
+  parser.add_argument("basepath", nargs="?", default=config.basepath,
+                      help="directory prefix holding content/, static/ and template.html")
+  parser.add_argument("--full", action="store_true",
+                      help="wipe docs/ and rebuild every page instead of building incrementally")
+  parser.add_argument("-j", "--jobs", type=int, default=1,
+                      help="number of worker processes used to render pages (0 = one per CPU)")
+  parser.add_argument("--static-checksum", action="store_true",
+                      help="compare static files by content hash instead of size and mtime")
+  parser.add_argument("--link-static", action="store_true",
+                      help="hardlink static files into docs/ instead of copying them")
+  parser.add_argument("--copy-threads", type=int, default=4,
+                      help="number of threads used to copy static files")
+  parser.add_argument("--io-threads", type=int, default=4,
+                      help="threads per process that read and write pages around rendering (0 = synchronous)")
+  parser.add_argument("--no-body-cache", action="store_true",
+                      help="do not reuse rendered page bodies cached by earlier builds")
+  parser.add_argument("--body-cache-size", type=int, default=256, metavar="MB",
+                      help="size limit of the rendered body cache")
+  parser.add_argument("--memo", type=int, default=0, metavar="ENTRIES",
+                      help="memoize up to ENTRIES rendered inline texts and blocks shared across pages")
+  parser.add_argument("--fingerprint", action="store_true",
+                      help="copy static files as name.<hash>.ext and point pages at those names, "
+                           "listing them in docs/assets.json")
+  parser.add_argument("--precompress", action="store_true",
+                      help="write .gz (and .zst/.br where available) copies of pages and text assets next to them")
+  parser.add_argument("--compress-threads", type=int, default=4,
+                      help="number of threads used to precompress files")
+  parser.add_argument("--minify", action="store_true",
+                      help="strip comments and insignificant whitespace from the generated HTML")
+  parser.add_argument("--shard", type=shard_arg, metavar="I/N",
+                      help="build only shard I of N (numbered from 1); shard 1 also copies static/")
+  parser.add_argument("--merge", nargs="+", metavar="DIR",
+                      help="merge shard builds (each DIR holding docs/ and the build cache) into docs/ and exit")
+  parser.add_argument("--depends-on", metavar="PATH",
+                      help="list the pages whose last build used PATH (e.g. static/images/tom.png) and exit")
+  parser.add_argument("--profile", action="store_true",
+                      help="print per-stage timings and the slowest pages after the build")
+  parser.add_argument("--trace", metavar="FILE",
+                      help="write per-page stage timings as JSON to FILE (implies --profile)")
+  parser.add_argument("--watch", action="store_true",
+                      help="keep running and rebuild pages as content/, static/ or template.html change")
+  parser.add_argument("--serve", type=int, metavar="PORT",
+                      help="serve docs/ on PORT while watching for changes (implies --watch)")
+  parser.add_argument("--interval", type=float, default=0.2,
+                      help="seconds between change polls in watch mode")
+  args = parser.parse_args(argv)
+  if args.fingerprint and (args.watch or args.serve):
+    parser.error("--fingerprint cannot be combined with --watch or --serve")
+  if args.precompress and (args.watch or args.serve):
+    # The watcher rewrites pages and static files without refreshing their variants
+    parser.error("--precompress cannot be combined with --watch or --serve")
+  return args
+
+def main(argv=None):
+  args = parse_args(sys.argv[1:] if argv is None else argv)
+  config.basepath = args.basepath
+  profiler.enabled = args.profile or args.trace is not None
+  if args.memo:
+    memo.enable(args.memo, args.memo)
+
+  cache_dir = f"{config.basepath}{config.cache_dir}"
+  snapshot_path = os.path.join(cache_dir, "snapshot.json")
+  site_paths = [f"{config.basepath}content", f"{config.basepath}static", f"{config.basepath}template.html"]
+  output_paths = [f"{config.basepath}docs"]
+  settings = {"basepath": config.basepath, "fingerprint": args.fingerprint, "precompress": args.precompress,
+              "minify": args.minify, "parser": PARSER_VERSION, "inline_tokenizer": config.inline_tokenizer}
+  # A profiled build has to render pages to have anything to report
+  fast_path = not (args.full or args.shard or args.merge or args.depends_on or args.watch or args.serve or
+                   args.static_checksum or profiler.enabled)
+  if fast_path and snapshot.is_unchanged(snapshot_path, settings, site_paths + output_paths):
+    print("Nothing changed since the last build")
+    return
+
+  # Imported here so the no-op path above stays cheap
+  from depgraph import DependencyGraph
+  from manifest import Manifest
+  from sharding import merge_shards
+  from site_builder import build_site
+
+  if args.depends_on is not None:
+    graph = DependencyGraph.from_pages(Manifest.load(os.path.join(cache_dir, "manifest.json")).pages)
+    for output in graph.dependents(os.path.normpath(os.path.join(config.basepath, args.depends_on))):
+      print(output)
+    return
+
+  snapshot.discard_snapshot(snapshot_path)
+  if args.merge:
+    merge_stats = merge_shards(args.merge, f"{config.basepath}docs", os.path.join(cache_dir, "manifest.json"),
+                               link=args.link_static)
+    print(merge_stats.summary())
+    for conflict in merge_stats.conflicts:
+      print(f"Conflict: {conflict}", file=sys.stderr)
+    if merge_stats.conflicts:
+      sys.exit(1)
+    return
+
+  # Taken before building, so edits made during the build are seen next time
+  site_snapshot = snapshot.take_snapshot(site_paths)
+  body_cache = None
+  if not args.no_body_cache:
+    body_cache = BodyCache(os.path.join(cache_dir, "bodies"), args.body_cache_size * 1024 * 1024)
+
+  stats = build_site(
+    f"{config.basepath}content",
+    f"{config.basepath}static",
+    f"{config.basepath}template.html",
+    f"{config.basepath}docs",
+    os.path.join(cache_dir, "manifest.json"),
+    config.basepath,
+    full=args.full,
+    workers=args.jobs or os.cpu_count() or 1,
+    static_checksum=args.static_checksum,
+    static_link=args.link_static,
+    copy_threads=args.copy_threads,
+    io_threads=args.io_threads,
+    body_cache=body_cache,
+    shard=args.shard,
+    fingerprint=args.fingerprint,
+    compress=args.precompress,
+    compress_threads=args.compress_threads,
+    minify=args.minify,
+  )
+  print(stats.summary())
+  if profiler.enabled:
+    collected = profiler.take_profiles()
+    print(profiler.summary(collected))
+    if args.trace:
+      profiler.write_trace(collected, args.trace)
+  for source_path, error in stats.errors:
+    print(f"Failed to generate {source_path}: {error}", file=sys.stderr)
+  for source_path, url in stats.broken:
+    print(f"Broken reference in {source_path}: {url}", file=sys.stderr)
+  if not stats.errors and args.shard is None:
+    site_snapshot.update(snapshot.take_snapshot(output_paths))
+    snapshot.save_snapshot(snapshot_path, settings, site_snapshot)
+
+  if args.watch or args.serve:
+    from urls import root_folder_for
+    from watcher import SiteWatcher, start_server
+    watcher = SiteWatcher(
+      f"{config.basepath}content",
+      f"{config.basepath}static",
+      f"{config.basepath}template.html",
+      f"{config.basepath}docs",
+      body_cache,
+      minify=args.minify,
+    )
+    if args.serve:
+      start_server(f"{config.basepath}docs", args.serve, root_folder_for(config.basepath))
+    print("Watching for changes, press Ctrl+C to stop")
+    try:
+      watcher.watch(args.interval)
+    except KeyboardInterrupt:
+      return
+
+  if stats.errors:
+    sys.exit(1)
 
 if __name__ == "__main__":
   main()
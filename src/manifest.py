@@ -0,0 +1,68 @@
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 2
+HASH_CHUNK_SIZE = 1 << 20
+
+def hash_bytes(data):
+  return hashlib.sha256(data).hexdigest()
+
+def hash_file(path):
+  digest = hashlib.sha256()
+  with open(path, "rb") as f:
+    while chunk := f.read(HASH_CHUNK_SIZE):
+      digest.update(chunk)
+  return digest.hexdigest()
+
+
+class Manifest:
+  def __init__(self, path, template_hash=None, basepath=None, pages=None, assets=None):
+    self.path = path
+    self.template_hash = template_hash
+    self.basepath = basepath
+    self.pages = pages if pages is not None else {}
+    # The fingerprinted asset map the pages were built with, if any
+    self.assets = assets
+
+  @classmethod
+  def load(cls, path):
+    try:
+      with open(path, "r") as f:
+        data = json.load(f)
+    except (OSError, ValueError):
+      return cls(path)
+
+    if data.get("version") != MANIFEST_VERSION:
+      return cls(path)
+
+    return cls(
+      path,
+      template_hash=data.get("template_hash"),
+      basepath=data.get("basepath"),
+      pages=data.get("pages", {}),
+      assets=data.get("assets"),
+    )
+
+  def reset(self, template_hash, basepath):
+    self.template_hash = template_hash
+    self.basepath = basepath
+    self.pages = {}
+
+  def save(self):
+    directory = os.path.dirname(self.path)
+    if directory and not os.path.exists(directory):
+      os.makedirs(directory)
+
+    data = {
+      "version": MANIFEST_VERSION,
+      "template_hash": self.template_hash,
+      "basepath": self.basepath,
+      "pages": self.pages,
+    }
+    if self.assets is not None:
+      data["assets"] = self.assets
+    tmp_path = self.path + ".tmp"
+    with open(tmp_path, "w") as f:
+      json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, self.path)
@@ -0,0 +1,66 @@
+from collections import OrderedDict
+
+
+class LRUMemo:
+  def __init__(self, max_entries):
+    self.max_entries = max_entries
+    self.entries = OrderedDict()
+    self.hits = 0
+    self.misses = 0
+
+  def get(self, key):
+    value = self.entries.get(key)
+    if value is None:
+      self.misses += 1
+      return None
+    self.entries.move_to_end(key)
+    self.hits += 1
+    return value
+
+  def put(self, key, value):
+    self.entries[key] = value
+    if len(self.entries) > self.max_entries:
+      self.entries.popitem(last=False)
+
+
+# Memo tables shared by every page rendered in this process; None when disabled
+inline = None
+blocks = None
+
+def enable(inline_entries, block_entries):
+  global inline, blocks
+  inline = LRUMemo(inline_entries) if inline_entries else None
+  blocks = LRUMemo(block_entries) if block_entries else None
+
+def disable():
+  global inline, blocks
+  inline = None
+  blocks = None
+
+def sizes():
+  if inline is None and blocks is None:
+    return None
+  return (inline.max_entries if inline else 0, blocks.max_entries if blocks else 0)
+
+def take_stats():
+  # Counters since the last call, so worker processes can report deltas
+  stats = {}
+  for name, table in (("inline", inline), ("blocks", blocks)):
+    if table is not None:
+      stats[name] = (table.hits, table.misses)
+      table.hits = table.misses = 0
+  return stats
+
+def merge_stats(total, stats):
+  for name, (hits, misses) in stats.items():
+    previous_hits, previous_misses = total.get(name, (0, 0))
+    total[name] = (previous_hits + hits, previous_misses + misses)
+  return total
+
+def format_stats(stats):
+  parts = []
+  for name, (hits, misses) in stats.items():
+    lookups = hits + misses
+    rate = hits / lookups * 100 if lookups else 0.0
+    parts.append(f"{name} memo {hits} hit(s) / {misses} miss(es) ({rate:.0f}%)")
+  return ", ".join(parts)
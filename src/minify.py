@@ -0,0 +1,109 @@
+import re
+
+TOKEN_PATTERN = re.compile(r"<!--.*?-->|<[a-zA-Z/!?][^>]*>|[^<]+|<", re.S)
+TAG_NAME_PATTERN = re.compile(r"<(/?)!?([a-zA-Z][\w:-]*)")
+# HTML whitespace; a no-break space is content and stays
+WHITESPACE_PATTERN = re.compile(r"[ \t\n\r\f]+")
+
+# Whitespace inside these elements is significant and left as it is
+RAW_TAGS = {"pre", "code", "textarea", "script", "style"}
+# Whitespace next to these tags never renders
+BLOCK_TAGS = {
+  "address", "article", "aside", "base", "blockquote", "body", "dd", "details", "div", "dl", "doctype", "dt",
+  "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "head", "header",
+  "hr", "html", "li", "link", "main", "meta", "nav", "ol", "p", "pre", "section", "table", "tbody", "td",
+  "tfoot", "th", "thead", "title", "tr", "ul",
+}
+
+# Bytes removed from pages rendered in this process since the last take_saved()
+saved = 0
+
+def record(count):
+  global saved
+  saved += count
+
+def take_saved():
+  global saved
+  count, saved = saved, 0
+  return count
+
+
+class Minifier:
+  # Removes comments and insignificant whitespace from HTML fed to it in
+  # arbitrary chunks. Tags are passed through untouched; a tag or comment
+  # split across chunks is held back until it is complete.
+  def __init__(self):
+    self.buffer = ""
+    self.text = ""
+    self.previous_tag = None
+    self.raw_depth = 0
+    self.saved = 0
+
+  def feed(self, chunk):
+    data = self.buffer + chunk
+    cut = len(data)
+    comment = data.rfind("<!--")
+    if comment != -1 and data.find("-->", comment + 4) == -1:
+      cut = comment
+    bracket = data.rfind("<", 0, cut)
+    if bracket != -1 and data.find(">", bracket, cut) == -1:
+      cut = bracket
+    self.buffer = data[cut:]
+    return "".join(self.tokens(data[:cut]))
+
+  def finish(self):
+    data, self.buffer = self.buffer, ""
+    return "".join(self.tokens(data)) + self.flush_text(None)
+
+  def tokens(self, data):
+    for match in TOKEN_PATTERN.finditer(data):
+      token = match.group(0)
+      if self.raw_depth:
+        if token.startswith("<") and len(token) > 1:
+          self.previous_tag = self.tag_name(token)
+          self.track_raw(token)
+        yield token
+      elif token.startswith("<!--") and not token.startswith("<!--[if"):
+        self.saved += len(token.encode())
+      elif token.startswith("<") and len(token) > 1:
+        name = self.tag_name(token)
+        yield self.flush_text(name)
+        yield token
+        self.previous_tag = name
+        self.track_raw(token)
+      else:
+        self.text += token
+
+  def tag_name(self, token):
+    match = TAG_NAME_PATTERN.match(token)
+    return match.group(2).lower() if match else None
+
+  def track_raw(self, token):
+    match = TAG_NAME_PATTERN.match(token)
+    if match and match.group(2).lower() in RAW_TAGS and not token.endswith("/>"):
+      self.raw_depth = max(0, self.raw_depth + (-1 if match.group(1) else 1))
+
+  def flush_text(self, next_tag):
+    # Runs of whitespace become one space, dropped entirely next to a block tag
+    text, self.text = self.text, ""
+    if not text:
+      return ""
+    collapsed = WHITESPACE_PATTERN.sub(" ", text)
+    if self.previous_tag in BLOCK_TAGS:
+      collapsed = collapsed.lstrip(" ")
+    if next_tag in BLOCK_TAGS:
+      collapsed = collapsed.rstrip(" ")
+    self.saved += len(text) - len(collapsed)
+    return collapsed
+
+def minify_chunks(chunks, minifier):
+  for chunk in chunks:
+    output = minifier.feed(chunk)
+    if output:
+      yield output
+  output = minifier.finish()
+  if output:
+    yield output
+
+def minify(html):
+  return "".join(minify_chunks([html], Minifier()))
@@ -1,38 +1,21 @@
 import os 
-import shutil
 import sys
 import config
+import profiler
+import memo
+import minify
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-from htmlnode import markdown_to_html_node
-  
-def copy_directory_recursive(source_dir, dest_dir):
-  # Step 1: If destination directory exists, delete all its contents
-  if os.path.exists(dest_dir):
-    shutil.rmtree(dest_dir)  # Remove destination directory and all contents
+from page_io import SyncIO, open_backend
+from template import load_template
 
-  # Step 2: Create the destination directory fresh
-  os.makedirs(dest_dir)
-
-  # Step 3: List all entries in the source directory
-  entries = os.listdir(source_dir)
-
-  # Step 4: For each entry in the source directory
-  for entry in entries:
-    source_path = os.path.join(source_dir, entry)
-    dest_path = os.path.join(dest_dir, entry)
-
-    # Step 5: If entry is a file
-    if os.path.isfile(source_path):
-      shutil.copy(source_path, dest_path)  # Copy file to destination
-      print("Copied file: " + dest_path)    # Log the copied file path
-
-    # Step 6: If entry is a directory
-    else:
-      # Recursively copy the subdirectory
-      copy_directory_recursive(source_path, dest_path)
 
+@profiler.profiled("title")
 def extract_title(markdown):
-  lines = markdown.split('\n')
+  return find_title(markdown.split('\n'))
+
+def find_title(lines):
+  # Stops at the first h1, so an open file is only read up to the title line
   for line in lines:
     for space_cnt in range(0, 4):
       hash_tag = space_cnt * " " + "# "
@@ -41,43 +24,182 @@ def extract_title(markdown):
         return title
   raise Exception("No h1 header found in the markdown text")
 
-def generate_page(from_path, template_path, dest_path):
+def generate_page(from_path, template_path, dest_path, template=None, body_cache=None, io=None):
   print("Generating page from " + from_path + " to " + dest_path + " using " + template_path)
-  with open(from_path, "r") as f:
-    markdown_content = f.read()
-  with open(template_path, "r") as f:
-    template_content = f.read()
-  
-  html_node = markdown_to_html_node(markdown_content)
-  html_content = html_node.to_html()
-  title = extract_title(markdown_content)
-
-  dest_dir = os.path.dirname(dest_path)
-  basepath = config.basepath.rstrip(os.sep)
-  root_folder = "/" + os.path.basename(basepath) if basepath else basepath
-
-  if not os.path.exists(dest_dir):
-    os.makedirs(dest_dir)
-  final_html = template_content.replace("{{ Title }}", title) \
-                  .replace("{{ Content }}", html_content) \
-                  .replace('href="/', 'href="' + root_folder + "/") \
-                  .replace('src="/', 'src="' + root_folder + "/static/") \
-                  .replace('href="static/', 'href="' + root_folder + "/static/")
-  
-  with open(dest_path, "w") as f:
-    f.write(final_html)
-
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path):
-  entries = os.listdir(dir_path_content)
-
-  for entry in entries:
+  profiler.start(from_path)
+  try:
+    return write_page(from_path, template_path, dest_path, template, body_cache, io or SyncIO())
+  finally:
+    profiler.finish()
+
+def collect_chunks(chunks, sink):
+  for chunk in chunks:
+    sink.append(chunk)
+    yield chunk
+
+def write_page(from_path, template_path, dest_path, template, body_cache, io):
+  if template is None:
+    template = load_template(template_path, config.basepath, config.assets)
+  with profiler.stage("read"):
+    markdown_content = io.read(from_path)
+  if markdown_content is None:
+    return stream_page(from_path, dest_path, template, io)
+
+  cache_key = body_cache.key(markdown_content) if body_cache is not None else None
+  cached = body_cache.get(cache_key) if cache_key is not None else None
+  body_chunks = []
+  # (attribute, url) of the links and images in the body, recorded as their
+  # nodes are built or kept with the cached body
+  references = set()
+  if cached is not None:
+    title, content, cached_references = cached
+    references.update(cached_references)
+  else:
+    # The parser is imported on first use, so builds with nothing to render never load it
+    from htmlnode import collecting_references, markdown_to_html_node
+    with collecting_references(references):
+      html_node = markdown_to_html_node(markdown_content)
+    title = extract_title(markdown_content)
+    content = profiler.profiled_iter("serialize", html_node.iter_html())
+    if cache_key is not None:
+      content = collect_chunks(content, body_chunks)
+
+  write_output(dest_path, template, title, content, io)
+
+  if cache_key is not None and cached is None:
+    body_cache.put(cache_key, title, "".join(body_chunks), references)
+  return template.references | references
+
+def stream_page(from_path, dest_path, template, io):
+  # Large sources are never held in memory: the title comes from a scan that
+  # stops at the first h1, then the file is re-read block by block and each
+  # block is written out as soon as it is complete. The body cache is skipped
+  # because its key needs the whole document.
+  from htmlnode import collecting_references, iter_markdown_html
+  references = set()
+  # Blocks are built while the page is written, so references are collected throughout
+  with open(from_path, "r") as f, collecting_references(references):
+    with profiler.stage("title"):
+      title = find_title(f)
+    f.seek(0)
+    content = profiler.profiled_iter("serialize", iter_markdown_html(f))
+    write_output(dest_path, template, title, content, io)
+  return template.references | references
+
+def write_output(dest_path, template, title, content, io):
+  minifier = None
+  if template.minify:
+    minifier = minify.Minifier()
+    content = minify.minify_chunks(content, minifier)
+  with profiler.stage("template_write"):
+    io.write(dest_path, lambda f: template.write(f, Title=title, Content=content))
+  if minifier is not None:
+    minify.record(template.saved + minifier.saved)
+
+def collect_page_jobs(dir_path_content, dest_dir_path):
+  jobs = []
+  for entry in os.listdir(dir_path_content):
     source_path = os.path.join(dir_path_content, entry)
     if os.path.isfile(source_path):
       name_without_ext, _ = os.path.splitext(entry)
-      dest_filename = name_without_ext + ".html"  
-      dest_path = os.path.join(dest_dir_path, dest_filename)
-      generate_page(source_path, template_path, dest_path)  
+      jobs.append((source_path, os.path.join(dest_dir_path, name_without_ext + ".html")))
     else:
-      dest_path = os.path.join(dest_dir_path, entry)
-      generate_pages_recursive(source_path, template_path, dest_path)
+      jobs.extend(collect_page_jobs(source_path, os.path.join(dest_dir_path, entry)))
+  return jobs
+
+worker_state = {}
+
+def init_worker(basepath, profiling, state):
+  # Spawned workers do not inherit module state, so pass the basepath explicitly
+  config.basepath = basepath
+  profiler.enabled = profiling
+  config.assets = state["assets"]
+  worker_state.update(state)
+  if state["memo_sizes"] is not None and memo.sizes() != state["memo_sizes"]:
+    memo.enable(*state["memo_sizes"])
+
+def describe_error(e):
+  return f"{type(e).__name__}: {e}"
+
+def generate_page_job(job, io):
+  from_path, dest_path = job
+  try:
+    references = generate_page(from_path, worker_state["template_path"], dest_path, worker_state["template"],
+                               worker_state["body_cache"], io)
+  except Exception as e:
+    minify.take_saved()
+    return from_path, describe_error(e), profiler.take_profiles(), memo.take_stats(), None, 0
+  return from_path, None, profiler.take_profiles(), memo.take_stats(), sorted(references), minify.take_saved()
+
+def generate_page_batch(jobs):
+  # Every output directory of the batch is created once up front, sources are
+  # read ahead of rendering and writes drain in the background.
+  io = open_backend(worker_state["io_threads"], worker_state["digests"])
+  io.make_dirs(dest_path for _, dest_path in jobs)
+  io.prefetch(from_path for from_path, _ in jobs)
+  try:
+    results = [generate_page_job(job, io) for job in jobs]
+  finally:
+    write_errors = io.close()
+  sources = {dest_path: from_path for from_path, dest_path in jobs}
+  failed = {sources[dest_path]: describe_error(e) for dest_path, e in write_errors.items()}
+  batch = []
+  for (from_path, error, page_profiles, memo_stats, references, saved), (_, dest_path) in zip(results, jobs):
+    error = failed.get(from_path, error)
+    output = None
+    if error is None:
+      digest, written = io.outcomes[dest_path]
+      output = {"digest": digest, "written": written, "references": references, "minified": saved}
+    batch.append((from_path, error, page_profiles, memo_stats, output))
+  return batch
+
+def generate_pages(jobs, template_path, workers=1, body_cache=None, memo_totals=None, io_threads=4,
+                   digests=None, outputs=None, minify_html=False, on_output=None):
+  # memo_totals, if given, accumulates memo hit/miss counts from every worker.
+  # digests maps output paths to the digests recorded by the previous build;
+  # outputs, if given, receives the output digest, whether it was written,
+  # the (attribute, url) references and the bytes removed by minifying of
+  # every page rendered. on_output, if given, is called with the source path
+  # and output of each page as its batch comes back, while later batches
+  # are still rendering.
+  memo_totals = {} if memo_totals is None else memo_totals
+  outputs = {} if outputs is None else outputs
+  if not jobs:
+    return []
+  # The template is read and compiled once per build, not once per page
+  state = {
+    "template_path": template_path,
+    "template": load_template(template_path, config.basepath, config.assets, minify_html),
+    "body_cache": body_cache,
+    "memo_sizes": memo.sizes(),
+    "io_threads": io_threads,
+    "digests": digests or {},
+    "assets": config.assets,
+  }
+  errors = []
+
+  def collect(batch):
+    for from_path, error, page_profiles, memo_stats, output in batch:
+      profiler.profiles.extend(page_profiles)
+      memo.merge_stats(memo_totals, memo_stats)
+      if error is not None:
+        errors.append((from_path, error))
+      elif output is not None:
+        outputs[from_path] = output
+        if on_output is not None:
+          on_output(from_path, output)
 
+  initargs = (config.basepath, profiler.enabled, state)
+  if workers <= 1 or len(jobs) <= 1:
+    init_worker(*initargs)
+    collect(generate_page_batch(jobs))
+  else:
+    # Each worker renders whole batches so its I/O backend can batch across pages
+    size = max(1, len(jobs) // (workers * 4))
+    batches = [jobs[i:i + size] for i in range(0, len(jobs), size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=initargs) as pool:
+      for future in as_completed([pool.submit(generate_page_batch, batch) for batch in batches]):
+        collect(future.result())
+  # Batches finish in any order; errors are reported in job order
+  order = {from_path: idx for idx, (from_path, _) in enumerate(jobs)}
+  return sorted(errors, key=lambda error: order[error[0]])
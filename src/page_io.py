@@ -0,0 +1,155 @@
+import filecmp
+import hashlib
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import config
+
+def read_source(path):
+  # Sources at or above the stream threshold are left on disk (None) for the
+  # caller to stream, so prefetching never loads a huge file whole.
+  with open(path, "r") as f:
+    if os.fstat(f.fileno()).st_size >= config.stream_threshold:
+      return None
+    return f.read()
+
+def same_files(left, right):
+  try:
+    if os.path.getsize(left) != os.path.getsize(right):
+      return False
+    return filecmp.cmp(left, right, shallow=False)
+  except OSError:
+    return False
+
+
+class HashingWriter:
+  def __init__(self, f):
+    self.f = f
+    self.digest = hashlib.sha256()
+
+  def write(self, data):
+    self.digest.update(data.encode())
+    return self.f.write(data)
+
+
+class SyncIO:
+  # digests maps output paths to the digests of what earlier builds wrote
+  # there, letting unchanged pages skip the write without reading the old file.
+  # outcomes records (digest, written) for every page handed to write().
+  def __init__(self, digests=None):
+    self.directories = set()
+    self.digests = digests or {}
+    self.outcomes = {}
+
+  def prefetch(self, paths):
+    pass
+
+  def make_dirs(self, paths):
+    for path in paths:
+      try:
+        self.ensure_dir(os.path.dirname(path))
+      except OSError:
+        # Left for write() to raise, so the failure is charged to its page
+        pass
+
+  def ensure_dir(self, directory):
+    if directory not in self.directories:
+      os.makedirs(directory, exist_ok=True)
+      self.directories.add(directory)
+
+  def read(self, path):
+    return read_source(path)
+
+  def write(self, dest_path, render):
+    # Writing in place needs no buffer, so every page streams
+    self.finish(dest_path, *self.write_temp(dest_path, render))
+
+  def write_temp(self, dest_path, render):
+    # The page is hashed while it streams to a temporary file, which keeps a
+    # half-written page from replacing the previous output if rendering fails.
+    self.ensure_dir(os.path.dirname(dest_path))
+    tmp_path = dest_path + ".tmp"
+    try:
+      with open(tmp_path, "w") as f:
+        writer = HashingWriter(f)
+        render(writer)
+    except BaseException:
+      if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+      raise
+    return tmp_path, writer.digest.hexdigest()
+
+  def is_current(self, dest_path, digest, tmp_path):
+    known = self.digests.get(dest_path)
+    if known is not None:
+      return known == digest and os.path.exists(dest_path)
+    # No digest on record, fall back to comparing with the file on disk
+    return same_files(tmp_path, dest_path)
+
+  def finish(self, dest_path, tmp_path, digest):
+    # The temporary file is dropped if the output turns out unchanged
+    try:
+      written = not self.is_current(dest_path, digest, tmp_path)
+      if written:
+        os.replace(tmp_path, dest_path)
+    finally:
+      if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    self.outcomes[dest_path] = (digest, written)
+
+  def close(self):
+    # Maps output paths to the exceptions of writes that failed after write() returned
+    return {}
+
+
+class ThreadedIO(SyncIO):
+  # Reads run ahead of rendering and writes are finished behind it on a
+  # thread pool. At most `window` reads and `window` writes are in flight.
+  def __init__(self, workers=4, window=16, digests=None):
+    super().__init__(digests)
+    self.pool = ThreadPoolExecutor(max_workers=workers)
+    self.window = window
+    self.queued = deque()
+    self.reads = {}
+    self.writes = {}
+    self.errors = {}
+
+  def prefetch(self, paths):
+    self.queued.extend(paths)
+    self.fill()
+
+  def fill(self):
+    while self.queued and len(self.reads) < self.window:
+      path = self.queued.popleft()
+      self.reads[path] = self.pool.submit(read_source, path)
+
+  def read(self, path):
+    future = self.reads.pop(path, None)
+    self.fill()
+    if future is None:
+      return read_source(path)
+    return future.result()
+
+  def write(self, dest_path, render):
+    # Pages stream to their temporary file as they render, so none is held
+    # in memory; comparing it with the previous output and renaming it into
+    # place trail behind on the pool
+    tmp_path, digest = self.write_temp(dest_path, render)
+    while len(self.writes) >= self.window:
+      self.reap(wait(list(self.writes), return_when=FIRST_COMPLETED).done)
+    self.writes[self.pool.submit(self.finish, dest_path, tmp_path, digest)] = dest_path
+
+  def reap(self, futures):
+    for future in futures:
+      dest_path = self.writes.pop(future)
+      if future.exception() is not None:
+        self.errors[dest_path] = future.exception()
+
+  def close(self):
+    self.reap(wait(list(self.writes)).done)
+    self.pool.shutdown(cancel_futures=True)
+    return self.errors
+
+def open_backend(threads, digests=None):
+  return ThreadedIO(threads, digests=digests) if threads > 0 else SyncIO(digests)
@@ -0,0 +1,160 @@
+import gzip
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from static_sync import collect_file_jobs
+
+try:
+  from compression import zstd
+except ImportError:
+  zstd = None
+try:
+  import zstandard
+except ImportError:
+  zstandard = None
+try:
+  import brotli
+except ImportError:
+  brotli = None
+
+# Files under static/ worth compressing; generated pages are always compressed
+TEXT_EXTENSIONS = {".css", ".csv", ".html", ".js", ".json", ".map", ".mjs", ".svg", ".txt", ".xml"}
+
+
+def compress_gzip(data):
+  # mtime=0 keeps the output identical across builds
+  return gzip.compress(data, compresslevel=9, mtime=0)
+
+def compress_zstd(data):
+  if zstd is not None:
+    return zstd.compress(data, level=19)
+  return zstandard.ZstdCompressor(level=19).compress(data)
+
+def compress_brotli(data):
+  return brotli.compress(data, quality=11)
+
+def available_encodings():
+  # (suffix, compress) of every encoding this interpreter can produce
+  encodings = [(".gz", compress_gzip)]
+  if zstd is not None or zstandard is not None:
+    encodings.append((".zst", compress_zstd))
+  if brotli is not None:
+    encodings.append((".br", compress_brotli))
+  return encodings
+
+
+class CompressStats:
+  def __init__(self):
+    self.compressed = 0
+    self.skipped = 0
+    # suffix -> [bytes of the files it covers, bytes of their variants]
+    self.sizes = {}
+
+  def summary(self):
+    ratios = ", ".join(f"{suffix} {compressed / original:.0%}"
+                       for suffix, (original, compressed) in sorted(self.sizes.items()) if original)
+    return f"compressed {self.compressed} file(s)" + (f" ({ratios} of original size)" if ratios else "")
+
+
+def collect_sources(dest_dir):
+  sources = []
+  static_dir = os.path.join(dest_dir, "static")
+  for path, _ in collect_file_jobs(dest_dir, dest_dir) if os.path.isdir(dest_dir) else []:
+    extension = os.path.splitext(path)[1]
+    if extension == ".html" or (extension in TEXT_EXTENSIONS and path.startswith(static_dir + os.sep)):
+      sources.append(path)
+  return sources
+
+def write_variant(path, data):
+  tmp_path = path + ".tmp"
+  with open(tmp_path, "wb") as f:
+    f.write(data)
+  os.replace(tmp_path, path)
+
+def compress_file(path, encodings):
+  # Returns {suffix: variant size, or None where compressing did not help}
+  with open(path, "rb") as f:
+    data = f.read()
+  sizes = {}
+  for suffix, compress in encodings:
+    compressed = compress(data)
+    if len(compressed) < len(data):
+      write_variant(path + suffix, compressed)
+      sizes[suffix] = len(compressed)
+    else:
+      sizes[suffix] = None
+      if os.path.exists(path + suffix):
+        os.remove(path + suffix)
+  return sizes
+
+def variant_paths(path, sizes):
+  return [path + suffix for suffix, size in sizes.items() if size is not None]
+
+def load_state(path):
+  try:
+    with open(path, "r") as f:
+      return json.load(f)
+  except (OSError, ValueError):
+    return {}
+
+def save_state(path, state):
+  directory = os.path.dirname(path)
+  if directory and not os.path.exists(directory):
+    os.makedirs(directory)
+  tmp_path = path + ".tmp"
+  with open(tmp_path, "w") as f:
+    json.dump(state, f, separators=(",", ":"))
+  os.replace(tmp_path, path)
+
+def precompress(dest_dir, state_path, workers=4, encodings=None):
+  # Writes a compressed variant next to every page and text asset under
+  # dest_dir. The state file records each source's size and mtime when it
+  # was compressed, so unchanged files are skipped. Returns the stats and the
+  # variants of files that are gone, for the caller to remove.
+  encodings = available_encodings() if encodings is None else encodings
+  suffixes = [suffix for suffix, _ in encodings]
+  stats = CompressStats()
+  previous = load_state(state_path)
+  state = {}
+  pending = []
+  for path in collect_sources(dest_dir):
+    stat = os.stat(path)
+    signature = [stat.st_size, stat.st_mtime_ns]
+    entry = previous.get(path)
+    if (entry is not None and entry[:2] == signature and sorted(entry[2]) == sorted(suffixes) and
+        all(os.path.exists(variant) for variant in variant_paths(path, entry[2]))):
+      state[path] = entry
+      stats.skipped += 1
+    else:
+      pending.append((path, signature))
+
+  if workers > 1 and len(pending) > 1:
+    # zlib, zstd and brotli release the GIL while compressing
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+      results = list(pool.map(lambda job: compress_file(job[0], encodings), pending))
+  else:
+    results = [compress_file(path, encodings) for path, _ in pending]
+  for (path, signature), sizes in zip(pending, results):
+    state[path] = signature + [sizes]
+  stats.compressed = len(pending)
+
+  for path, (size, _, sizes) in state.items():
+    for suffix, compressed in sizes.items():
+      totals = stats.sizes.setdefault(suffix, [0, 0])
+      totals[0] += size
+      totals[1] += size if compressed is None else compressed
+
+  orphans = []
+  for path, entry in previous.items():
+    kept = state[path][2] if path in state else {}
+    orphans.extend(variant for variant in variant_paths(path, entry[2]) if variant not in variant_paths(path, kept))
+  save_state(state_path, state)
+  return stats, orphans
+
+def discard_variants(state_path):
+  # Variants left by an earlier build with precompression turned on
+  orphans = [variant for path, entry in load_state(state_path).items() for variant in variant_paths(path, entry[2])]
+  if os.path.exists(state_path):
+    os.remove(state_path)
+  return orphans
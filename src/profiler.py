@@ -0,0 +1,134 @@
+import functools
+import json
+import time
+from contextlib import nullcontext
+
+enabled = False
+# Profile of the page currently being generated, or None when profiling is off
+current = None
+# Finished profiles collected during this build
+profiles = []
+
+
+class Profile:
+  def __init__(self, label):
+    self.label = label
+    self.stages = {}
+    self.total = 0.0
+    self.started = time.perf_counter()
+    self.stack = []
+
+  def enter(self):
+    self.stack.append([time.perf_counter(), 0.0])
+
+  def exit(self, name):
+    # Stage times are exclusive: time spent in nested stages is charged to them only
+    start, nested = self.stack.pop()
+    elapsed = time.perf_counter() - start
+    if self.stack:
+      self.stack[-1][1] += elapsed
+    entry = self.stages.setdefault(name, [0.0, 0])
+    entry[0] += elapsed - nested
+    entry[1] += 1
+
+  def to_dict(self):
+    return {
+      "label": self.label,
+      "total": self.total,
+      "stages": {name: {"seconds": seconds, "calls": calls} for name, (seconds, calls) in self.stages.items()},
+    }
+
+
+class Stage:
+  def __init__(self, profile, name):
+    self.profile = profile
+    self.name = name
+
+  def __enter__(self):
+    self.profile.enter()
+
+  def __exit__(self, *exc_info):
+    self.profile.exit(self.name)
+
+
+def start(label):
+  global current
+  if enabled:
+    current = Profile(label)
+
+def finish():
+  global current
+  if current is not None:
+    current.total = time.perf_counter() - current.started
+    profiles.append(current)
+    current = None
+
+def stage(name):
+  if current is None:
+    return nullcontext()
+  return Stage(current, name)
+
+def profiled(name):
+  def decorator(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+      profile = current
+      if profile is None:
+        return func(*args, **kwargs)
+      profile.enter()
+      try:
+        return func(*args, **kwargs)
+      finally:
+        profile.exit(name)
+    return wrapper
+  return decorator
+
+def profiled_iter(name, iterable):
+  if current is None:
+    return iterable
+  return _timed_iter(current, name, iterable)
+
+def _timed_iter(profile, name, iterable):
+  iterator = iter(iterable)
+  while True:
+    profile.enter()
+    try:
+      item = next(iterator)
+    except StopIteration:
+      return
+    finally:
+      profile.exit(name)
+    yield item
+
+def take_profiles():
+  taken = profiles[:]
+  profiles.clear()
+  return taken
+
+def stage_totals(collected):
+  totals = {}
+  for profile in collected:
+    for name, (seconds, calls) in profile.stages.items():
+      entry = totals.setdefault(name, [0.0, 0])
+      entry[0] += seconds
+      entry[1] += calls
+  return totals
+
+def summary(collected, top=10):
+  totals = stage_totals(collected)
+  wall = sum(profile.total for profile in collected) or 1.0
+  lines = ["Stage totals:"]
+  for name, (seconds, calls) in sorted(totals.items(), key=lambda item: -item[1][0]):
+    lines.append(f"  {name:<16} {seconds * 1000:>10.2f} ms {calls:>9} calls {seconds / wall * 100:>6.1f}%")
+  lines.append(f"Slowest of {len(collected)} profiled item(s):")
+  for profile in sorted(collected, key=lambda profile: -profile.total)[:top]:
+    lines.append(f"  {profile.total * 1000:>10.2f} ms  {profile.label}")
+  return "\n".join(lines)
+
+def write_trace(collected, path):
+  data = {
+    "totals": {name: {"seconds": seconds, "calls": calls} for name, (seconds, calls) in stage_totals(collected).items()},
+    "profiles": [profile.to_dict() for profile in collected],
+  }
+  with open(path, "w") as f:
+    json.dump(data, f, indent=2)
@@ -0,0 +1,102 @@
+import filecmp
+import hashlib
+import os
+
+import config
+from manifest import Manifest
+from static_sync import collect_file_jobs, copy_file, is_unchanged, remove_orphans
+
+
+class MergeStats:
+  def __init__(self):
+    self.copied = 0
+    self.skipped = 0
+    self.removed = 0
+    self.conflicts = []
+
+  def summary(self):
+    if self.conflicts:
+      return f"Merge failed with {len(self.conflicts)} conflict(s)"
+    return (f"Merged {self.copied} file(s), skipped {self.skipped} unchanged, "
+            f"removed {self.removed} stale output(s)")
+
+
+def parse_shard(spec):
+  # "2/4" -> (2, 4); shards are numbered from 1 like CI matrix jobs
+  index, _, count = spec.partition("/")
+  try:
+    index, count = int(index), int(count)
+  except ValueError:
+    raise ValueError(f"Shard must look like I/N, got {spec!r}")
+  if count < 1 or not 1 <= index <= count:
+    raise ValueError(f"Shard index must be between 1 and {count}, got {spec!r}")
+  return index, count
+
+def shard_of(source_path, content_dir, count):
+  # Hash the path relative to content/ with "/" separators, so every machine
+  # assigns a page to the same shard whatever its checkout location
+  relative = os.path.relpath(source_path, content_dir).replace(os.sep, "/")
+  digest = hashlib.sha256(relative.encode()).digest()
+  return int.from_bytes(digest[:8], "big") % count + 1
+
+def select_shard(jobs, content_dir, shard):
+  if shard is None:
+    return jobs
+  index, count = shard
+  return [job for job in jobs if shard_of(job[0], content_dir, count) == index]
+
+def owns_static(shard):
+  return shard is None or shard[0] == 1
+
+def merge_manifests(manifests, stats):
+  merged = None
+  for root, manifest in manifests:
+    if manifest.basepath is None:
+      stats.conflicts.append(f"{root}: no usable manifest")
+      continue
+    if merged is None:
+      merged = Manifest(None, manifest.template_hash, manifest.basepath, dict(manifest.pages), manifest.assets)
+      continue
+    if manifest.basepath != merged.basepath:
+      stats.conflicts.append(f"{root}: built with basepath {manifest.basepath!r}, not {merged.basepath!r}")
+    if manifest.template_hash != merged.template_hash:
+      stats.conflicts.append(f"{root}: built from a different template.html")
+    if manifest.assets != merged.assets:
+      stats.conflicts.append(f"{root}: built with different fingerprinted static files")
+    for source_path, entry in manifest.pages.items():
+      if merged.pages.setdefault(source_path, entry) != entry:
+        stats.conflicts.append(f"{root}: {source_path} was also built by another shard")
+  return merged
+
+def merge_shards(shard_roots, dest_dir, manifest_path, link=False):
+  # Each shard root holds the docs/ and manifest of one shard build. Nothing
+  # is written unless the shards merge without conflicts.
+  stats = MergeStats()
+  manifests = []
+  for root in shard_roots:
+    manifests.append((root, Manifest.load(os.path.join(root, config.cache_dir, "manifest.json"))))
+  merged = merge_manifests(manifests, stats)
+
+  sources = {}
+  for root in shard_roots:
+    shard_docs = os.path.join(root, "docs")
+    jobs = collect_file_jobs(shard_docs, dest_dir) if os.path.isdir(shard_docs) else []
+    for source_path, dest_path in jobs:
+      previous = sources.setdefault(dest_path, source_path)
+      if previous != source_path and not filecmp.cmp(previous, source_path, shallow=False):
+        stats.conflicts.append(f"{os.path.relpath(dest_path, dest_dir)} differs between {previous} and {source_path}")
+  if stats.conflicts:
+    return stats
+
+  for dest_path, source_path in sources.items():
+    if is_unchanged(source_path, dest_path):
+      stats.skipped += 1
+    else:
+      copy_file(source_path, dest_path, link)
+      stats.copied += 1
+  if os.path.isdir(dest_dir):
+    remove_orphans(dest_dir, set(sources), stats)
+
+  merged.path = manifest_path
+  merged.save()
+  return stats
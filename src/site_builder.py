@@ -0,0 +1,239 @@
+import os
+import shutil
+
+import config
+import memo
+import profiler
+from assets import HashCache, fingerprint_assets, write_asset_manifest
+from body_cache import PARSER_VERSION
+from depgraph import MISSING, PRESENT, DependencyGraph
+from link_check import LinkChecker, PathIndex
+from manifest import Manifest, hash_bytes, hash_file
+from page_generator import collect_page_jobs, generate_pages
+from precompress import available_encodings, discard_variants, precompress
+from sharding import owns_static, select_shard, shard_of
+from static_sync import sync_directory
+from urls import root_folder_for
+
+
+class BuildStats:
+  def __init__(self):
+    self.generated = 0
+    self.written = 0
+    self.identical = 0
+    self.skipped = 0
+    self.copied = 0
+    self.removed = 0
+    self.errors = []
+    # (source path, URL) of every reference to a page or static file that does not exist
+    self.broken = []
+    self.compression = None
+    # Bytes removed by minifying the pages generated, or None when not minifying
+    self.minified = None
+    self.memo = {}
+
+  def summary(self):
+    return (f"Generated {self.generated} page(s) ({self.written} written, {self.identical} identical), "
+            f"copied {self.copied} static file(s), "
+            f"skipped {self.skipped} unchanged, removed {self.removed} stale output(s)" +
+            (f", {len(self.errors)} page(s) failed" if self.errors else "") +
+            (f", {len(self.broken)} broken reference(s)" if self.broken else "") +
+            (f", {self.compression.summary()}" if self.compression else "") +
+            (f", minifying saved {self.minified} byte(s)" if self.minified is not None else "") +
+            (f"; {memo.format_stats(self.memo)}" if self.memo else ""))
+
+
+def remove_output(path, dest_root):
+  if os.path.exists(path):
+    os.remove(path)
+
+  # Prune directories left empty by the removal, but never the output root itself
+  directory = os.path.dirname(path)
+  dest_root = os.path.normpath(dest_root)
+  while os.path.normpath(directory).startswith(dest_root + os.sep):
+    if os.listdir(directory):
+      break
+    os.rmdir(directory)
+    directory = os.path.dirname(directory)
+
+def is_up_to_date(entry, dest_path, graph, hashes, exists):
+  return (entry is not None and
+          entry.get("output") == dest_path and
+          os.path.exists(dest_path) and
+          not graph.is_stale(dest_path, hashes, exists))
+
+def page_inputs(source_path, template_path, hashes, references, checker, asset_digests=None):
+  # Fingerprinted static files are recorded by digest, since their URLs
+  # change with their content
+  asset_digests = asset_digests or {}
+  inputs = {source_path: hashes[source_path], template_path: hashes[template_path]}
+  for _, url in references:
+    candidates, found = checker.resolve(url)
+    for path in found:
+      inputs.setdefault(path, asset_digests.get(path, PRESENT))
+    if not found:
+      # A missing target is recorded under every path that could provide it
+      for path in candidates:
+        inputs.setdefault(path, MISSING)
+  return inputs
+
+def remove_stale_outputs(old_entries, new_entries, dest_root, stats):
+  live_outputs = {entry["output"] for entry in new_entries.values()}
+  for source, entry in old_entries.items():
+    output = entry.get("output")
+    if source in new_entries and new_entries[source]["output"] == output:
+      continue
+    if output and output not in live_outputs:
+      remove_output(output, dest_root)
+      stats.removed += 1
+
+def build_site(content_dir, static_dir, template_path, dest_dir, manifest_path, basepath, full=False, workers=1,
+               static_checksum=False, static_link=False, copy_threads=4, body_cache=None,
+               io_threads=4, shard=None, fingerprint=False, compress=False, minify=False,
+               compress_threads=4):
+  # shard is (index, count) to build only that partition of the pages
+  stats = BuildStats()
+  assets, asset_digests = None, {}
+  if fingerprint:
+    hash_cache = HashCache(os.path.join(os.path.dirname(manifest_path), "asset-hashes.json"))
+    assets, asset_digests = fingerprint_assets(static_dir, hash_cache)
+    hash_cache.save()
+  # Read by the renderer (and passed on to workers) to resolve static URLs
+  config.assets = assets
+
+  manifest = Manifest.load(manifest_path)
+  # The renderer's output format is an input of every page too, folded into
+  # the template's hash so a parser change rebuilds pages built before it
+  template_hash = hash_bytes(f"{hash_file(template_path)}:{PARSER_VERSION}:{config.inline_tokenizer}".encode())
+  if minify:
+    # Pages come out of a minified template differently, so toggling the
+    # option reaches every page through its template input
+    template_hash = hash_bytes(f"{template_hash}:minify".encode())
+  if shard is not None:
+    # Pages of other shards are neither built nor cleaned up here
+    manifest.pages = {source_path: entry for source_path, entry in manifest.pages.items()
+                      if shard_of(source_path, content_dir, shard[1]) == shard[0]}
+
+  if full:
+    if os.path.exists(dest_dir):
+      shutil.rmtree(dest_dir)
+    manifest.reset(template_hash, basepath)
+  elif manifest.basepath != basepath:
+    # Outputs recorded under another basepath live in a different tree, so forget them
+    manifest.reset(template_hash, basepath)
+  elif (manifest.assets is None) != (assets is None):
+    # Turning fingerprinting on or off changes every static URL
+    manifest.reset(template_hash, basepath)
+
+  if owns_static(shard):
+    profiler.start(static_dir)
+    try:
+      with profiler.stage("static_sync"):
+        sync_stats = sync_directory(static_dir, os.path.join(dest_dir, "static"),
+                                    checksum=static_checksum, link=static_link, workers=copy_threads,
+                                    assets=assets, keep_suffixes=[suffix for suffix, _ in available_encodings()])
+    finally:
+      profiler.finish()
+    asset_manifest = os.path.join(dest_dir, "assets.json")
+    if assets is not None:
+      write_asset_manifest(asset_manifest, assets)
+    elif os.path.exists(asset_manifest):
+      os.remove(asset_manifest)
+    stats.copied = sync_stats.copied + sync_stats.linked
+    stats.skipped += sync_stats.skipped
+    stats.removed += sync_stats.removed
+
+  # Every page records the inputs it was built from: its source and the
+  # template by content hash, plus the pages and static files it references.
+  # A page is rebuilt only when one of those inputs changed.
+  graph = DependencyGraph.from_pages(manifest.pages)
+  all_jobs = collect_page_jobs(content_dir, dest_dir)
+  jobs = select_shard(all_jobs, content_dir, shard)
+  template_key = os.path.normpath(template_path)
+  hashes = {template_key: template_hash}
+  for source_path, _ in jobs:
+    hashes[os.path.normpath(source_path)] = hash_file(source_path)
+  hashes.update(asset_digests)
+
+  # Every page source and static file, listed once: references are checked
+  # against it as rendered pages come back, with no stat per link
+  index = PathIndex(source_path for source_path, _ in all_jobs)
+  index.add_tree(static_dir)
+  aliases = {}
+  for relative, fingerprinted in (assets or {}).items():
+    aliases[os.path.normpath(os.path.join(static_dir, fingerprinted))] = os.path.normpath(os.path.join(static_dir, relative))
+  checker = LinkChecker(index, content_dir, static_dir, root_folder_for(basepath), aliases)
+  exists = index.__contains__
+
+  page_entries = {}
+  dirty_jobs = []
+  for source_path, dest_path in jobs:
+    entry = manifest.pages.get(source_path)
+    if is_up_to_date(entry, dest_path, graph, hashes, exists):
+      stats.skipped += 1
+      page_entries[source_path] = entry
+    else:
+      dirty_jobs.append((source_path, dest_path))
+
+  # Digests of what is already on disk let re-rendered pages that come out
+  # byte-identical skip the write and keep their mtime.
+  digests = {entry["output"]: entry["digest"] for entry in manifest.pages.values() if "digest" in entry}
+  dest_paths = dict(dirty_jobs)
+
+  def record_output(source_path, output):
+    # Runs as each batch comes back, so references are checked while the
+    # workers render the remaining batches
+    if output["written"]:
+      stats.written += 1
+    else:
+      stats.identical += 1
+    if minify:
+      stats.minified += output["minified"]
+    inputs = page_inputs(os.path.normpath(source_path), template_key, hashes, output["references"], checker,
+                         asset_digests)
+    page_entries[source_path] = {"output": dest_paths[source_path], "digest": output["digest"], "inputs": inputs}
+    broken = checker.broken(output["references"])
+    if broken:
+      page_entries[source_path]["broken"] = broken
+
+  if minify:
+    stats.minified = 0
+  stats.errors = generate_pages(dirty_jobs, template_path, workers, body_cache, stats.memo, io_threads,
+                                digests, minify_html=minify, on_output=record_output)
+  stats.generated = len(dirty_jobs) - len(stats.errors)
+  for source_path, _ in stats.errors:
+    # Keep the previous entry (if any) so the page is retried on the next build
+    if source_path in manifest.pages:
+      page_entries[source_path] = manifest.pages[source_path]
+  remove_stale_outputs(manifest.pages, page_entries, dest_dir, stats)
+
+  # Compressed variants of every page and text asset, refreshed for the files
+  # that changed; variants whose file is gone (or every variant, once
+  # precompression is turned off) are removed
+  compress_state = os.path.join(os.path.dirname(manifest_path), "compressed.json")
+  if compress:
+    profiler.start(dest_dir)
+    try:
+      with profiler.stage("precompress"):
+        stats.compression, orphans = precompress(dest_dir, compress_state, compress_threads)
+    finally:
+      profiler.finish()
+  else:
+    orphans = discard_variants(compress_state)
+  for path in orphans:
+    if os.path.exists(path):
+      remove_output(path, dest_dir)
+      stats.removed += 1
+
+  # Pages skipped as up to date report the broken references recorded when
+  # they were built; any change to their targets would have rebuilt them
+  for source_path, entry in sorted(page_entries.items()):
+    stats.broken.extend((source_path, url) for url in entry.get("broken", ()))
+
+  manifest.template_hash = template_hash
+  manifest.assets = assets
+  manifest.pages = page_entries
+  manifest.save()
+  if body_cache is not None:
+    body_cache.prune()
+  return stats
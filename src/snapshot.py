@@ -0,0 +1,68 @@
+import json
+import os
+
+# Kept free of heavy imports: main.py consults it before loading the build code.
+
+def scan_tree(directory, snapshot):
+  # Files can disappear while they are scanned (editors' swap and backup
+  # files do), so whatever can no longer be read is left out
+  try:
+    entries = list(os.scandir(directory))
+  except OSError:
+    return
+  for entry in entries:
+    try:
+      if entry.is_dir(follow_symlinks=False):
+        scan_tree(entry.path, snapshot)
+        continue
+      stat = entry.stat()
+    except OSError:
+      continue
+    snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+
+def take_snapshot(paths):
+  # (mtime, size) of every file under the given directories, and of the
+  # given files themselves
+  snapshot = {}
+  for path in paths:
+    if os.path.isdir(path):
+      scan_tree(path, snapshot)
+    else:
+      try:
+        stat = os.stat(path)
+      except OSError:
+        continue
+      snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+  return snapshot
+
+def load_snapshot(path, settings):
+  try:
+    with open(path, "r") as f:
+      data = json.load(f)
+  except (OSError, ValueError):
+    return None
+  if data.get("settings") != settings:
+    return None
+  return {file_path: tuple(signature) for file_path, signature in data.get("files", {}).items()}
+
+def save_snapshot(path, settings, snapshot):
+  directory = os.path.dirname(path)
+  if directory and not os.path.exists(directory):
+    os.makedirs(directory)
+  tmp_path = path + ".tmp"
+  with open(tmp_path, "w") as f:
+    json.dump({"settings": settings, "files": snapshot}, f, separators=(",", ":"))
+  os.replace(tmp_path, path)
+
+def discard_snapshot(path):
+  try:
+    os.remove(path)
+  except FileNotFoundError:
+    pass
+
+def is_unchanged(path, settings, paths):
+  # True when every file under paths has the size and mtime recorded after
+  # the last successful build, no file was added or removed, and the build
+  # settings (the basepath and options affecting the output) are the same
+  recorded = load_snapshot(path, settings)
+  return recorded is not None and recorded == take_snapshot(paths)
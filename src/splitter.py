@@ -1,6 +1,14 @@
 import re
+import config
+from profiler import profiled
+from block import scan_blocks
 from textnode import TextType, TextNode
 
+INLINE_DELIMITERS = (("**", TextType.BOLD), ("_", TextType.ITALIC), ("`", TextType.CODE))
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+IMAGE_OR_LINK_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)|(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
   new_nodes = []
   for node in old_nodes:
@@ -20,64 +28,41 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
   return new_nodes
 
 def extract_markdown_images(text):
-  pattern = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
-  matches = re.findall(pattern, text)
-  return matches
+  return IMAGE_PATTERN.findall(text)
 
 def extract_markdown_links(text):
-  pattern = r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
-  matches = re.findall(pattern, text)
-  return matches
+  return LINK_PATTERN.findall(text)
 
-def split_nodes_image(old_nodes):
+def split_nodes_pattern(old_nodes, pattern, text_type):
+  # One finditer pass per node; the text between matches is sliced out by
+  # offset, so repeated matches and regex metacharacters in URLs are safe.
   new_nodes = []
   for node in old_nodes:
     if node.text_type != TextType.TEXT:
       new_nodes.append(node)
       continue
-    img_matches = extract_markdown_images(node.text)
-    if not img_matches:
-      new_nodes.append(node)
-      continue
-
-    current_text = node.text
-    for alt_text, url in img_matches:
-      parts = current_text.split(f"![{alt_text}]({url})")
-      if len(parts)> 0 and parts[0]:
-        new_nodes.append(TextNode(parts[0], TextType.TEXT))
-      new_nodes.append(TextNode(alt_text, TextType.IMAGE, url))
-      current_text = parts[1] if len(parts) > 1 else None
-
-    if current_text:
-      new_nodes.append(TextNode(current_text, TextType.TEXT))
 
-  return new_nodes
+    position = 0
+    for match in pattern.finditer(node.text):
+      if match.start() > position:
+        new_nodes.append(TextNode(node.text[position:match.start()], TextType.TEXT))
+      new_nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+      position = match.end()
 
-def split_nodes_link(old_nodes):
-  new_nodes = []
-  for node in old_nodes:
-    if node.text_type != TextType.TEXT:
-      new_nodes.append(node)
-      continue
-    link_matches = extract_markdown_links(node.text)
-    if not link_matches:
+    if position == 0:
       new_nodes.append(node)
-      continue
+    elif position < len(node.text):
+      new_nodes.append(TextNode(node.text[position:], TextType.TEXT))
 
-    current_text = node.text
-    for text, url in link_matches:
-      parts = re.split(fr"(?<!!)\[{text}\]\({url}\)", current_text)
-      if len(parts)> 0 and parts[0]:
-        new_nodes.append(TextNode(parts[0], TextType.TEXT))
-      new_nodes.append(TextNode(text, TextType.LINK, url))
-      current_text = parts[1] if len(parts) > 1 else None
+  return new_nodes
 
-    if current_text:
-      new_nodes.append(TextNode(current_text, TextType.TEXT))
+def split_nodes_image(old_nodes):
+  return split_nodes_pattern(old_nodes, IMAGE_PATTERN, TextType.IMAGE)
 
-  return new_nodes
+def split_nodes_link(old_nodes):
+  return split_nodes_pattern(old_nodes, LINK_PATTERN, TextType.LINK)
 
-def text_to_textnodes(text):
+def text_to_textnodes_pipeline(text):
   nodes = [TextNode(text, TextType.TEXT)]
   bold_splited = split_nodes_delimiter(nodes, '**', TextType.BOLD)
   ltalic_splited = split_nodes_delimiter(bold_splited, '_', TextType.ITALIC)
@@ -87,14 +72,58 @@ def text_to_textnodes(text):
 
   return link_splited
 
-def markdown_to_blocks(markdown):
-  blocks = markdown.split("\n\n")
-  cleaned_blocks = []
-  for block in blocks:
-    stripped_block = block.strip()
-    if stripped_block:
-      cleaned_blocks.append(stripped_block)
-  return cleaned_blocks
+def scan_images_and_links(text, start, end, nodes):
+  position = start
+  for match in IMAGE_OR_LINK_PATTERN.finditer(text, start, end):
+    if match.start() > position:
+      nodes.append(TextNode(text[position:match.start()], TextType.TEXT))
+    if match.group(2) is not None:
+      nodes.append(TextNode(match.group(1), TextType.IMAGE, match.group(2)))
+    else:
+      nodes.append(TextNode(match.group(3), TextType.LINK, match.group(4)))
+    position = match.end()
+
+  if position == start:
+    # Like the pipeline, a segment without images or links is kept even when empty
+    nodes.append(TextNode(text[start:end], TextType.TEXT))
+  elif position < end:
+    nodes.append(TextNode(text[position:end], TextType.TEXT))
+
+def scan_delimited(text, start, end, level, nodes):
+  if level == len(INLINE_DELIMITERS):
+    scan_images_and_links(text, start, end, nodes)
+    return
+
+  # Delimiters are only searched for inside the plain-text gaps left by the
+  # higher-priority delimiters, so every character is visited once per level.
+  delimiter, text_type = INLINE_DELIMITERS[level]
+  width = len(delimiter)
+  position = start
+  while True:
+    opening = text.find(delimiter, position, end)
+    if opening == -1:
+      scan_delimited(text, position, end, level + 1, nodes)
+      return
+    closing = text.find(delimiter, opening + width, end)
+    if closing == -1:
+      raise ValueError("A matching closing delimiter is not found")
+    scan_delimited(text, position, opening, level + 1, nodes)
+    nodes.append(TextNode(text[opening + width:closing], text_type))
+    position = closing + width
 
+def text_to_textnodes_scanner(text):
+  nodes = []
+  scan_delimited(text, 0, len(text), 0, nodes)
+  return nodes
 
+INLINE_TOKENIZERS = {
+  "pipeline": text_to_textnodes_pipeline,
+  "scanner": text_to_textnodes_scanner,
+}
 
+@profiled("inline")
+def text_to_textnodes(text):
+  return INLINE_TOKENIZERS[config.inline_tokenizer](text)
+
+def markdown_to_blocks(markdown):
+  return ["\n".join(lines) for _, lines in scan_blocks(markdown)]
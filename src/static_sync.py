@@ -0,0 +1,137 @@
+import filecmp
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from manifest import hash_file
+
+try:
+  import fcntl
+except ImportError:
+  fcntl = None
+
+# ioctl request number for FICLONE (copy-on-write clone) on Linux
+FICLONE = 0x40049409
+
+
+class SyncStats:
+  def __init__(self):
+    self.copied = 0
+    self.linked = 0
+    self.skipped = 0
+    self.removed = 0
+
+
+def collect_file_jobs(source_dir, dest_dir):
+  jobs = []
+  for entry in os.listdir(source_dir):
+    source_path = os.path.join(source_dir, entry)
+    dest_path = os.path.join(dest_dir, entry)
+    if os.path.isfile(source_path):
+      jobs.append((source_path, dest_path))
+    else:
+      jobs.extend(collect_file_jobs(source_path, dest_path))
+  return jobs
+
+def is_unchanged(source_path, dest_path, checksum=False):
+  try:
+    source_stat = os.stat(source_path)
+    dest_stat = os.stat(dest_path)
+  except FileNotFoundError:
+    return False
+
+  if source_stat.st_size != dest_stat.st_size:
+    return False
+  if checksum:
+    return hash_file(source_path) == hash_file(dest_path)
+  if source_stat.st_mtime_ns == dest_stat.st_mtime_ns:
+    return True
+  # Same size but a different mtime (e.g. the source was touched or checked
+  # out again): leave the output and its mtime alone if the bytes match.
+  return filecmp.cmp(source_path, dest_path, shallow=False)
+
+def clone_or_copy(source_path, dest_path):
+  with open(source_path, "rb") as source, open(dest_path, "wb") as dest:
+    if fcntl is not None:
+      try:
+        fcntl.ioctl(dest.fileno(), FICLONE, source.fileno())
+        return
+      except OSError:
+        pass
+
+    # No reflink support: copy in the kernel where possible
+    remaining = os.fstat(source.fileno()).st_size
+    try:
+      while remaining > 0:
+        copied = os.copy_file_range(source.fileno(), dest.fileno(), remaining)
+        if copied == 0:
+          break
+        remaining -= copied
+    except (AttributeError, OSError):
+      source.seek(0)
+      dest.seek(0)
+      dest.truncate()
+      shutil.copyfileobj(source, dest)
+
+def copy_file(source_path, dest_path, link=False):
+  os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+  if os.path.lexists(dest_path):
+    # Never write through a hardlink into the source tree
+    os.remove(dest_path)
+
+  if link:
+    try:
+      os.link(source_path, dest_path)
+      return True
+    except OSError:
+      pass
+
+  clone_or_copy(source_path, dest_path)
+  # Keep the source mtime so the next sync can compare size and mtime
+  shutil.copystat(source_path, dest_path)
+  return False
+
+def remove_orphans(dest_dir, expected, stats, keep_suffixes=()):
+  # Files named like an expected file plus one of keep_suffixes (its
+  # precompressed variants) are left in place
+  for root, dirs, files in os.walk(dest_dir, topdown=False):
+    for name in files:
+      path = os.path.join(root, name)
+      if path not in expected and not any(path.endswith(suffix) and path[:-len(suffix)] in expected
+                                          for suffix in keep_suffixes):
+        os.remove(path)
+        stats.removed += 1
+    if root != dest_dir and not os.listdir(root):
+      os.rmdir(root)
+
+def fingerprint_jobs(jobs, source_dir, dest_dir, assets):
+  # Send each file to its fingerprinted name from the asset map
+  renamed = []
+  for source_path, _ in jobs:
+    relative = os.path.relpath(source_path, source_dir).replace(os.sep, "/")
+    renamed.append((source_path, os.path.join(dest_dir, *assets.get(relative, relative).split("/"))))
+  return renamed
+
+def sync_directory(source_dir, dest_dir, checksum=False, link=False, workers=4, assets=None, keep_suffixes=()):
+  stats = SyncStats()
+  jobs = collect_file_jobs(source_dir, dest_dir) if os.path.isdir(source_dir) else []
+  if assets is not None:
+    jobs = fingerprint_jobs(jobs, source_dir, dest_dir, assets)
+  pending = []
+  for source_path, dest_path in jobs:
+    if is_unchanged(source_path, dest_path, checksum):
+      stats.skipped += 1
+    else:
+      pending.append((source_path, dest_path))
+
+  if workers > 1 and len(pending) > 1:
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+      linked = list(pool.map(lambda job: copy_file(*job, link=link), pending))
+  else:
+    linked = [copy_file(source_path, dest_path, link) for source_path, dest_path in pending]
+  stats.linked = sum(linked)
+  stats.copied = len(linked) - stats.linked
+
+  if os.path.isdir(dest_dir):
+    remove_orphans(dest_dir, {dest_path for _, dest_path in jobs}, stats, keep_suffixes)
+  return stats
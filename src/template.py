@@ -0,0 +1,67 @@
+import re
+
+from minify import Minifier, minify_chunks
+from urls import UrlResolver, root_folder_for
+
+SLOT_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+ATTRIBUTE_PATTERN = re.compile(r'(?<![\w-])(href|src)="([^"]*)"')
+
+def make_url_rewriter(resolver):
+  def rewrite(text):
+    return ATTRIBUTE_PATTERN.sub(
+      lambda match: f'{match.group(1)}="{resolver.attribute(match.group(1), match.group(2))}"', text)
+  return rewrite
+
+
+class Template:
+  def __init__(self, source, root_folder="", assets=None, minify=False):
+    # With minify, comments and insignificant whitespace are removed from the
+    # template once, here, and from every page body as it is written
+    self.minify = minify
+    self.saved = 0
+    if minify:
+      minifier = Minifier()
+      source = "".join(minify_chunks([source], minifier))
+      self.saved = minifier.saved
+    # URLs in the template's own attributes are resolved once, here; slot
+    # values are emitted verbatim since the renderer resolves body URLs itself
+    rewrite_urls = make_url_rewriter(UrlResolver(root_folder, assets))
+    # literals[i] precedes slots[i]; the final literal follows the last slot
+    self.literals = []
+    self.slots = []
+    position = 0
+    for match in SLOT_PATTERN.finditer(source):
+      self.literals.append(rewrite_urls(source[position:match.start()]))
+      self.slots.append((match.group(1), match.group(0)))
+      position = match.end()
+    self.literals.append(rewrite_urls(source[position:]))
+    # (attribute, url) of every resolved href and src in the template itself
+    self.references = {match.groups() for literal in self.literals for match in ATTRIBUTE_PATTERN.finditer(literal)}
+
+  def iter_chunks(self, **values):
+    # A value is either a string or an iterable of string chunks
+    yield self.literals[0]
+    for (name, placeholder), literal in zip(self.slots, self.literals[1:]):
+      value = values.get(name)
+      if value is None:
+        yield placeholder
+      elif isinstance(value, str):
+        yield value
+      else:
+        yield from value
+      yield literal
+
+  def render(self, **values):
+    return "".join(self.iter_chunks(**values))
+
+  def write(self, fp, **values):
+    for chunk in self.iter_chunks(**values):
+      fp.write(chunk)
+
+  def __repr__(self):
+    return f"Template({[name for name, _ in self.slots]})"
+
+
+def load_template(template_path, basepath, assets=None, minify=False):
+  with open(template_path, "r") as f:
+    return Template(f.read(), root_folder_for(basepath), assets, minify)
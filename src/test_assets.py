@@ -0,0 +1,61 @@
+import json
+import os
+import unittest
+from unittest import mock
+
+import assets
+from assets import HashCache, fingerprint_assets, fingerprint_name, write_asset_manifest
+from fixtures import TempDirTestCase
+
+class TestAssets(TempDirTestCase):
+  def setUp(self):
+    super().setUp()
+    self.static_dir = self.path("static")
+    self.write("static/index.css", "body {}")
+    self.write("static/images/tom.png", "png")
+    self.cache_path = self.path("cache", "asset-hashes.json")
+
+  def test_fingerprint_name(self):
+    self.assertEqual(fingerprint_name("images/tom.png", "0123456789abcdef"), "images/tom.01234567.png")
+    self.assertEqual(fingerprint_name("index.css", "0123456789abcdef"), "index.01234567.css")
+    self.assertEqual(fingerprint_name("LICENSE", "0123456789abcdef"), "LICENSE.01234567")
+
+  def test_fingerprint_assets(self):
+    mapping, digests = fingerprint_assets(self.static_dir, HashCache(self.cache_path))
+    self.assertEqual(sorted(mapping), ["images/tom.png", "index.css"])
+    self.assertRegex(mapping["images/tom.png"], r"^images/tom\.[0-9a-f]{8}\.png$")
+    self.assertEqual(digests[os.path.join(self.static_dir, "index.css")][:8], mapping["index.css"].split(".")[1])
+    self.assertEqual(fingerprint_assets(self.path("missing"), HashCache(self.cache_path)), ({}, {}))
+
+  def test_hashes_reused_while_size_and_mtime_match(self):
+    cache = HashCache(self.cache_path)
+    first, _ = fingerprint_assets(self.static_dir, cache)
+    cache.save()
+    with mock.patch.object(assets, "hash_file", side_effect=AssertionError("rehashed")):
+      self.assertEqual(fingerprint_assets(self.static_dir, HashCache(self.cache_path))[0], first)
+
+    self.write("static/index.css", "body { margin: 0 }")
+    cache = HashCache(self.cache_path)
+    second, _ = fingerprint_assets(self.static_dir, cache)
+    self.assertNotEqual(second["index.css"], first["index.css"])
+    self.assertEqual(second["images/tom.png"], first["images/tom.png"])
+
+    os.remove(os.path.join(self.static_dir, "images", "tom.png"))
+    cache = HashCache(self.cache_path)
+    fingerprint_assets(self.static_dir, cache)
+    cache.save()
+    with open(self.cache_path) as f:
+      self.assertEqual(list(json.load(f)), [os.path.join(self.static_dir, "index.css")])
+
+  def test_asset_manifest_rewritten_only_on_change(self):
+    path = self.path("docs", "assets.json")
+    write_asset_manifest(path, {"a.css": "a.1.css"})
+    os.utime(path, ns=(0, 0))
+    write_asset_manifest(path, {"a.css": "a.1.css"})
+    self.assertEqual(os.stat(path).st_mtime_ns, 0)
+    write_asset_manifest(path, {"a.css": "a.2.css"})
+    with open(path) as f:
+      self.assertEqual(json.load(f), {"a.css": "a.2.css"})
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,86 @@
+import os
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+import config
+from body_cache import BodyCache
+from fixtures import TempDirTestCase
+from page_generator import generate_page
+from template import Template
+
+class TestBodyCache(TempDirTestCase):
+  def setUp(self):
+    super().setUp()
+    self.cache = BodyCache(self.path("bodies"))
+
+  def test_round_trip(self):
+    key = self.cache.key("# Title\n\ntext")
+    self.assertIsNone(self.cache.get(key))
+    self.cache.put(key, "Title", "<div><p>text</p></div>", {("href", "/b"), ("src", "/a.png")})
+    self.assertEqual(self.cache.get(key), ("Title", "<div><p>text</p></div>", [("href", "/b"), ("src", "/a.png")]))
+
+  def test_key_depends_on_content_and_tokenizer(self):
+    key = self.cache.key("# A")
+    self.assertNotEqual(key, self.cache.key("# B"))
+    previous = config.inline_tokenizer
+    config.inline_tokenizer = "pipeline"
+    try:
+      self.assertNotEqual(key, self.cache.key("# A"))
+    finally:
+      config.inline_tokenizer = previous
+
+  def test_key_depends_on_root_folder(self):
+    previous = config.basepath
+    try:
+      config.basepath = "/"
+      key = self.cache.key("[a](/b)")
+      config.basepath = "/srv/site/"
+      self.assertNotEqual(key, self.cache.key("[a](/b)"))
+    finally:
+      config.basepath = previous
+
+  def test_corrupt_entry_is_a_miss(self):
+    key = self.cache.key("# A")
+    self.cache.put(key, "A", "body")
+    with open(self.cache.entry_path(key), "wb") as f:
+      f.write(b"garbage")
+    self.assertIsNone(self.cache.get(key))
+
+  def test_prune_evicts_least_recently_used(self):
+    self.cache.max_bytes = 0
+    keys = [self.cache.key(str(idx)) for idx in range(3)]
+    for idx, key in enumerate(keys):
+      self.cache.put(key, "T", "x" * 1000)
+      os.utime(self.cache.entry_path(key), ns=(idx, idx))
+    size = os.path.getsize(self.cache.entry_path(keys[0]))
+    self.cache.max_bytes = size
+    self.assertEqual(self.cache.prune(), 2)
+    self.assertIsNotNone(self.cache.get(keys[2]))
+    self.assertIsNone(self.cache.get(keys[0]))
+
+  def test_generate_page_reuses_cached_body(self):
+    source = self.write("index.md", "# Title\n\nSome **bold** text")
+    template = self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+    dest = self.path("out", "index.html")
+    with redirect_stdout(StringIO()):
+      generate_page(source, template, dest, body_cache=self.cache)
+      key = self.cache.key("# Title\n\nSome **bold** text")
+      self.assertEqual(self.cache.get(key), ("Title", "<div><h1>Title</h1><p>Some <b>bold</b> text</p></div>", []))
+      # A poisoned entry proves the second render is served from the cache
+      self.cache.put(key, "Cached", "<p>cached</p>")
+      generate_page(source, template, dest, body_cache=self.cache)
+    self.assertEqual(self.read(dest), "<title>Cached</title><p>cached</p>")
+
+  def test_cached_body_keeps_its_references(self):
+    source = self.write("index.md", "# Title\n\n[post](/blog)")
+    with redirect_stdout(StringIO()):
+      first = generate_page(source, "template.html", self.path("a.html"), Template("{{ Content }}"),
+                            body_cache=self.cache)
+      second = generate_page(source, "template.html", self.path("b.html"), Template("{{ Content }}"),
+                             body_cache=self.cache)
+    self.assertEqual(first, {("href", "/blog")})
+    self.assertEqual(second, first)
+
+if __name__ == "__main__":
+  unittest.main()
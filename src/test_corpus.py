@@ -0,0 +1,57 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from block import BlockType, block_to_block_type
+from corpus import generate_corpus, make_page, parse_block_mix
+from htmlnode import markdown_to_html_node
+from page_generator import extract_title
+from site_builder import build_site
+from splitter import markdown_to_blocks
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class TestCorpus(unittest.TestCase):
+  def test_generated_pages_render(self):
+    with tempfile.TemporaryDirectory() as tmp:
+      paths = generate_corpus(tmp, 12, blocks_per_page=15, fanout=3)
+      self.assertEqual(len(paths), 12)
+      self.assertTrue(os.path.exists(os.path.join(tmp, "index.md")))
+      for path in paths:
+        with open(path) as f:
+          markdown = f.read()
+        self.assertTrue(extract_title(markdown))
+        self.assertTrue(markdown_to_html_node(markdown).to_html().startswith("<div><h1>"))
+
+  def test_generated_references_exist(self):
+    with tempfile.TemporaryDirectory() as tmp:
+      generate_corpus(os.path.join(tmp, "content"), 30, inline_density=0.8, fanout=4)
+      shutil.copytree(os.path.join(REPO_ROOT, "static"), os.path.join(tmp, "static"))
+      with redirect_stdout(StringIO()):
+        stats = build_site(os.path.join(tmp, "content"), os.path.join(tmp, "static"),
+                           os.path.join(REPO_ROOT, "template.html"), os.path.join(tmp, "docs"),
+                           os.path.join(tmp, "manifest.json"), "/", io_threads=0)
+      self.assertEqual(stats.generated, 30)
+      self.assertEqual(stats.broken, [])
+
+  def test_generation_is_deterministic(self):
+    mix = parse_block_mix("paragraph=3,code=1")
+    first = make_page(10, mix, 0.3, random.Random(7))
+    second = make_page(10, mix, 0.3, random.Random(7))
+    self.assertEqual(first, second)
+
+  def test_block_mix_controls_block_types(self):
+    page = make_page(20, parse_block_mix("code"), 0.2, random.Random(1))
+    types = {block_to_block_type(block) for block in markdown_to_blocks(page)[1:]}
+    self.assertEqual(types, {BlockType.CODE})
+
+  def test_unknown_block_kind_raises(self):
+    with self.assertRaises(ValueError):
+      parse_block_mix("table=1")
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+
+from depgraph import MISSING, PRESENT, DependencyGraph, resolve_reference
+
+class TestResolveReference(unittest.TestCase):
+  def test_images_come_from_static(self):
+    self.assertEqual(resolve_reference("/static/images/tom.png", "/site/content", "/site/static"),
+                     ["/site/static/images/tom.png"])
+    self.assertEqual(resolve_reference("/static/index.css?v=1", "/site/content", "/site/static"),
+                     ["/site/static/index.css"])
+
+  def test_links_resolve_to_page_sources(self):
+    self.assertEqual(resolve_reference("/blog/tom", "/site/content", "/site/static"),
+                     ["/site/content/blog/tom/index.md", "/site/content/blog/tom.md"])
+    self.assertEqual(resolve_reference("/", "/site/content", "/site/static"), ["/site/content/index.md"])
+    self.assertEqual(resolve_reference("/contact/#form", "/site/content", "/site/static"),
+                     ["/site/content/contact/index.md", "/site/content/contact.md"])
+
+  def test_root_folder_is_stripped(self):
+    self.assertEqual(resolve_reference("/site/static/a.png", "/site/content", "/site/static", "/site"),
+                     ["/site/static/a.png"])
+    self.assertEqual(resolve_reference("/site/blog", "/site/content", "/site/static", "/site"),
+                     ["/site/content/blog/index.md", "/site/content/blog.md"])
+    self.assertEqual(resolve_reference("/site", "/site/content", "/site/static", "/site"), [])
+    self.assertEqual(resolve_reference("/other/blog", "/site/content", "/site/static", "/site"), [])
+
+  def test_external_and_relative_urls_are_ignored(self):
+    for url in ("https://example.com/a.png", "//cdn.example.com/a.png", "mailto:a@b.c", "#top", "page.html"):
+      with self.subTest(url=url):
+        self.assertEqual(resolve_reference(url, "/site/content", "/site/static"), [])
+
+
+class TestDependencyGraph(unittest.TestCase):
+  def setUp(self):
+    self.graph = DependencyGraph.from_pages({
+      "content/a.md": {"output": "docs/a.html", "inputs": {"content/a.md": "h1", "template.html": "t",
+                                                           "static/tom.png": PRESENT}},
+      "content/b.md": {"output": "docs/b.html", "inputs": {"content/b.md": "h2", "template.html": "t",
+                                                           "content/a.md": PRESENT, "static/x.png": MISSING}},
+    })
+    self.hashes = {"content/a.md": "h1", "content/b.md": "h2", "template.html": "t"}
+    self.present = {"content/a.md", "content/b.md", "static/tom.png"}
+
+  def stale(self):
+    return [output for output in ("docs/a.html", "docs/b.html")
+            if self.graph.is_stale(output, self.hashes, self.present.__contains__)]
+
+  def test_queries(self):
+    self.assertEqual(self.graph.dependents("static/tom.png"), ["docs/a.html"])
+    self.assertEqual(self.graph.dependents("template.html"), ["docs/a.html", "docs/b.html"])
+    self.assertEqual(self.graph.dependents("static/other.png"), [])
+
+  def test_nothing_changed(self):
+    self.assertEqual(self.stale(), [])
+
+  def test_source_edit_only_rebuilds_that_page(self):
+    # b links to a, but only a's existence matters to b
+    self.hashes["content/a.md"] = "h1-edited"
+    self.assertEqual(self.stale(), ["docs/a.html"])
+
+  def test_template_edit_rebuilds_everything(self):
+    self.hashes["template.html"] = "t2"
+    self.assertEqual(self.stale(), ["docs/a.html", "docs/b.html"])
+
+  def test_referenced_files_appearing_or_vanishing(self):
+    self.present.discard("static/tom.png")
+    self.assertEqual(self.stale(), ["docs/a.html"])
+    self.present.add("static/tom.png")
+    self.present.add("static/x.png")
+    self.assertEqual(self.stale(), ["docs/b.html"])
+
+  def test_unknown_output_is_stale(self):
+    self.assertTrue(self.graph.is_stale("docs/new.html", self.hashes, self.present.__contains__))
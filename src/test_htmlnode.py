@@ -1,7 +1,9 @@
 
 import unittest
 from enum import Enum
+from io import StringIO
 
+import config
 from htmlnode import HTMLNode, LeafNode, ParentNode, text_node_to_html_node, markdown_to_html_node
 from textnode import TextNode, TextType
 
@@ -24,6 +26,10 @@ class TestHTMLNode(unittest.TestCase):
       assert obj.props == props
 
 
+  def test_nodes_are_slotted(self):
+      for node in (HTMLNode(), LeafNode("b", "x"), ParentNode("p", [LeafNode(None, "x")])):
+          assert not hasattr(node, "__dict__")
+
   def test_props_to_html(self):
       # When props is None or empty, should return empty string
       obj = HTMLNode()
@@ -167,6 +173,31 @@ class TestHTMLNode(unittest.TestCase):
       expected_html = '<div class="container" id="main"><p>Hello</p></div>'
       assert node.to_html() == expected_html
 
+  def test_iter_html_chunks_join_to_html(self):
+      node = ParentNode("div", [LeafNode("b", "bold"), ParentNode("p", [LeafNode(None, "text")])], {"class": "x"})
+      chunks = list(node.iter_html())
+      self.assertGreater(len(chunks), 1)
+      self.assertEqual("".join(chunks), '<div class="x"><b>bold</b><p>text</p></div>')
+
+  def test_write_html_streams_to_file(self):
+      node = ParentNode("ul", [ParentNode("li", [LeafNode(None, f"item {i}")]) for i in range(3)])
+      buffer = StringIO()
+      node.write_html(buffer)
+      self.assertEqual(buffer.getvalue(), node.to_html())
+
+  def test_iter_html_deeply_nested_tree(self):
+      node = LeafNode(None, "deep")
+      for _ in range(5000):
+          node = ParentNode("span", [node])
+      html = node.to_html()
+      self.assertTrue(html.startswith("<span><span>"))
+      self.assertEqual(len(html), 5000 * len("<span></span>") + len("deep"))
+
+  def test_iter_html_nested_invalid_child_raises(self):
+      node = ParentNode("div", [ParentNode("p", [])])
+      with self.assertRaises(ValueError):
+          node.to_html()
+
   def test_text(self):
       node = TextNode("This is a text node", TextType.TEXT)
       html_node = text_node_to_html_node(node)
@@ -216,6 +247,19 @@ class TestHTMLNode(unittest.TestCase):
       assert html_node.value == ""
       assert html_node.props == {"src": "http://example.com/image.png", "alt": "An image"}
 
+  def test_site_urls_resolved_under_root_folder(self):
+      previous = config.basepath
+      config.basepath = "/srv/site/"
+      try:
+          link = text_node_to_html_node(TextNode("Home", TextType.LINK, "/blog"))
+          image = text_node_to_html_node(TextNode("Tom", TextType.IMAGE, "/images/tom.png"))
+          external = text_node_to_html_node(TextNode("Ex", TextType.LINK, "https://example.com/"))
+      finally:
+          config.basepath = previous
+      assert link.props == {"href": "/site/blog"}
+      assert image.props == {"src": "/site/static/images/tom.png", "alt": "Tom"}
+      assert external.props == {"href": "https://example.com/"}
+
   def test_text_node_to_html_node_unsupported_type(self):
       class FakeTextType(Enum):
           UNSUPPORTED = 99
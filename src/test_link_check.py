@@ -0,0 +1,37 @@
+import unittest
+
+from fixtures import TempDirTestCase
+from link_check import LinkChecker, PathIndex
+
+class TestLinkCheck(TempDirTestCase):
+  def setUp(self):
+    super().setUp()
+    self.write("static/images/tom.png", "png")
+    index = PathIndex(["/site/content/index.md", "/site/content/blog/tom/index.md"])
+    index.add_tree(self.path("static"))
+    self.checker = LinkChecker(index, "/site/content", self.path("static"), "/site")
+
+  def test_index_lists_static_files(self):
+    self.assertIn(self.path("static", "images", "tom.png"), self.checker.index)
+    self.assertNotIn(self.path("static", "images"), self.checker.index)
+
+  def test_broken_references(self):
+    references = [
+      ("href", "/site/"),
+      ("href", "/site/blog/tom"),
+      ("src", "/site/static/images/tom.png"),
+      ("src", "/site/static/images/jerry.png"),
+      ("href", "/site/blog/jerry"),
+      ("href", "/site/blog/jerry"),
+      ("href", "https://example.com/missing"),
+      ("href", "#top"),
+    ]
+    self.assertEqual(self.checker.broken(references), ["/site/blog/jerry", "/site/static/images/jerry.png"])
+
+  def test_urls_are_resolved_once(self):
+    self.checker.broken([("href", "/site/blog/tom")] * 3)
+    self.assertEqual(list(self.checker.resolved), ["/site/blog/tom"])
+    self.assertEqual(self.checker.resolve("/site/blog/tom")[1], ["/site/content/blog/tom/index.md"])
+
+if __name__ == "__main__":
+  unittest.main()
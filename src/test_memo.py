@@ -0,0 +1,59 @@
+import random
+import unittest
+
+import memo
+from corpus import DEFAULT_BLOCK_MIX, make_page
+from htmlnode import collecting_references, markdown_to_html_node, text_to_children
+
+class TestMemo(unittest.TestCase):
+  def tearDown(self):
+    memo.disable()
+
+  def test_lru_evicts_oldest(self):
+    table = memo.LRUMemo(2)
+    table.put("a", 1)
+    table.put("b", 2)
+    table.get("a")
+    table.put("c", 3)
+    self.assertIsNone(table.get("b"))
+    self.assertEqual(table.get("a"), 1)
+    self.assertEqual((table.hits, table.misses), (2, 1))
+
+  def test_memoized_output_matches_unmemoized(self):
+    rng = random.Random(5)
+    pages = [make_page(20, DEFAULT_BLOCK_MIX, 0.3, rng) for _ in range(5)]
+    expected = [markdown_to_html_node(page).to_html() for page in pages]
+    memo.enable(64, 64)
+    self.assertEqual([markdown_to_html_node(page).to_html() for page in pages], expected)
+    self.assertEqual([markdown_to_html_node(page).to_html() for page in pages], expected)
+
+  def test_repeated_blocks_hit_across_pages(self):
+    memo.enable(16, 16)
+    page = "# Title\n\nShared **disclaimer** text\n\n- nav one\n- nav two"
+    markdown_to_html_node(page)
+    markdown_to_html_node(page.replace("Title", "Other"))
+    stats = memo.take_stats()
+    self.assertEqual(stats["blocks"], (2, 4))
+    self.assertEqual(memo.take_stats()["blocks"], (0, 0))
+
+  def test_inline_fragment_is_shared(self):
+    memo.enable(16, 0)
+    first = text_to_children("a [link](/x) here")
+    second = text_to_children("a [link](/x) here")
+    self.assertIs(first[0], second[0])
+    self.assertEqual(first[0].to_html(), 'a <a href="/x">link</a> here')
+    self.assertNotIn("blocks", memo.take_stats())
+
+  def test_memo_hits_still_record_references(self):
+    memo.enable(16, 16)
+    page = "# Title\n\nsee [post](/blog) and ![a](/a.png)"
+    for _ in range(2):
+      with collecting_references(set()) as references:
+        markdown_to_html_node(page)
+      self.assertEqual(references, {("href", "/blog"), ("src", "/static/a.png")})
+
+  def test_format_stats(self):
+    self.assertEqual(memo.format_stats({"inline": (3, 1)}), "inline memo 3 hit(s) / 1 miss(es) (75%)")
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+import minify
+from minify import Minifier, minify_chunks
+
+class TestMinify(unittest.TestCase):
+  def test_whitespace_between_blocks_is_removed(self):
+    html = "<!doctype html>\n<html>\n  <head>\n    <title>T</title>\n  </head>\n  <body>\n    <p>a\n   b</p>\n  </body>\n</html>\n"
+    self.assertEqual(minify.minify(html), "<!doctype html><html><head><title>T</title></head><body><p>a b</p></body></html>")
+
+  def test_inline_spacing_is_kept(self):
+    self.assertEqual(minify.minify("<p><b>a</b>   <i>b</i>\n text</p>"), "<p><b>a</b> <i>b</i> text</p>")
+    self.assertEqual(minify.minify("<p>a  b</p>"), "<p>a  b</p>")
+
+  def test_comments_are_removed(self):
+    self.assertEqual(minify.minify("<p>a <!-- note --> b</p><!--[if IE]>x<![endif]-->"),
+                     "<p>a b</p><!--[if IE]>x<![endif]-->")
+
+  def test_code_is_untouched(self):
+    html = "<div>\n<pre><code>def f():\n    return  1\n<!-- kept --></code></pre>\n<p><code>a  b</code>  c</p></div>"
+    self.assertEqual(minify.minify(html),
+                     "<div><pre><code>def f():\n    return  1\n<!-- kept --></code></pre><p><code>a  b</code> c</p></div>")
+
+  def test_text_that_is_not_a_tag(self):
+    self.assertEqual(minify.minify("<p>< Back   home</p>"), "<p>< Back home</p>")
+    self.assertEqual(minify.minify("<p>1 <   2</p>"), "<p>1 < 2</p>")
+
+  def test_streaming_matches_whole_input(self):
+    html = "<div>\n  <p>one  <b>two</b></p><!-- c\n -->\n<pre>  x  </pre>\n <p>three</p>\n</div>\n"
+    expected = minify.minify(html)
+    for size in (1, 2, 3, 7):
+      with self.subTest(size=size):
+        minifier = Minifier()
+        chunks = [html[i:i + size] for i in range(0, len(html), size)]
+        self.assertEqual("".join(minify_chunks(chunks, minifier)), expected)
+        self.assertEqual(minifier.saved, len(html) - len(expected))
+
+  def test_saved_bytes_are_taken_once(self):
+    minify.take_saved()
+    minify.record(5)
+    minify.record(3)
+    self.assertEqual(minify.take_saved(), 8)
+    self.assertEqual(minify.take_saved(), 0)
+
+if __name__ == "__main__":
+  unittest.main()
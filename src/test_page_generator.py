@@ -1,6 +1,17 @@
 
+import os
+import tracemalloc
 import unittest
-from page_generator import extract_title
+from contextlib import redirect_stdout
+from io import StringIO
+
+import config
+from fixtures import TempDirTestCase
+from htmlnode import iter_markdown_html, markdown_to_html_node
+from page_generator import extract_title, find_title, generate_page
+from template import Template
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 class TestGenerator(unittest.TestCase):
     def test_basic_h1(self):
@@ -28,3 +39,72 @@ No h1 header here
 
     def test_h1_with_only_hash_and_spaces(self):
         self.assertEqual(extract_title("#    "), "")
+
+    def test_find_title_stops_at_first_h1(self):
+        def lines():
+            yield "intro\n"
+            yield "# Title\n"
+            raise AssertionError("read past the title")
+        self.assertEqual(find_title(lines()), "Title")
+
+
+class TestStreamingPages(TempDirTestCase):
+  def setUp(self):
+    super().setUp()
+    self.template_path = os.path.join(REPO_ROOT, "template.html")
+    self.previous_threshold = config.stream_threshold
+
+  def tearDown(self):
+    config.stream_threshold = self.previous_threshold
+
+  def render(self, source, threshold):
+    config.stream_threshold = threshold
+    dest = self.path(f"out{threshold}", "index.html")
+    with redirect_stdout(StringIO()):
+      generate_page(source, self.template_path, dest)
+    return self.read(dest)
+
+  def test_streamed_page_matches_buffered_page(self):
+    for name in ("index.md", os.path.join("blog", "tom", "index.md")):
+      source = os.path.join(REPO_ROOT, "content", name)
+      self.assertEqual(self.render(source, 0), self.render(source, 1 << 40))
+
+  def test_references_come_from_link_and_image_nodes(self):
+    source = self.write("index.md", '# T\n\n[post](/blog) and ![a](/a.png)\n\n`<a href="/fake">`\n\n```\n<img src="/nope.png">\n```\n\n'
+              'plain href="/text"')
+    template = Template('<link href="static/x.css" data-src="/ignored">{{ Content }}')
+    for threshold in (0, 1 << 40):
+      with self.subTest(threshold=threshold):
+        config.stream_threshold = threshold
+        with redirect_stdout(StringIO()):
+          references = generate_page(source, "template.html", self.path("out.html"), template)
+        self.assertEqual(sorted(references),
+                         [("href", "/blog"), ("href", "/static/x.css"), ("src", "/static/a.png")])
+
+  def test_iter_markdown_html_matches_tree(self):
+    markdown = "# Title\n\nSome **bold** text\n\n```\ncode\n```\n\n- a\n- b\n"
+    self.assertEqual("".join(iter_markdown_html(StringIO(markdown))), markdown_to_html_node(markdown).to_html())
+
+  def test_empty_document_raises(self):
+    with self.assertRaises(ValueError):
+      "".join(iter_markdown_html(StringIO("\n\n")))
+
+  def test_peak_memory_bounded_by_block(self):
+    source = self.path("big.md")
+    block = "some _text_ with a [link](/x) and `code`\n"
+    with open(source, "w") as f:
+      f.write("# Big\n\n")
+      for _ in range(4000):
+        f.write(block * 4 + "\n")
+    size = os.path.getsize(source)
+
+    config.stream_threshold = 0
+    dest = self.path("big.html")
+    tracemalloc.start()
+    try:
+      with redirect_stdout(StringIO()):
+        generate_page(source, self.template_path, dest)
+      _, peak = tracemalloc.get_traced_memory()
+    finally:
+      tracemalloc.stop()
+    self.assertLess(peak, size // 4)
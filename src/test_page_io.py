@@ -0,0 +1,157 @@
+import os
+from contextlib import redirect_stdout
+from io import StringIO
+
+import config
+from fixtures import TempDirTestCase
+from page_generator import collect_page_jobs, generate_pages
+from page_io import SyncIO, ThreadedIO, open_backend
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class TestPageIO(TempDirTestCase):
+  def setUp(self):
+    super().setUp()
+    self.previous_threshold = config.stream_threshold
+
+  def tearDown(self):
+    config.stream_threshold = self.previous_threshold
+
+  def test_open_backend(self):
+    self.assertIsInstance(open_backend(0), SyncIO)
+    io = open_backend(2)
+    self.assertIsInstance(io, ThreadedIO)
+    io.close()
+
+  def test_large_sources_are_left_for_streaming(self):
+    source = self.write("a.md", "# A\n")
+    config.stream_threshold = 1
+    self.assertIsNone(SyncIO().read(source))
+    config.stream_threshold = 1024
+    self.assertEqual(SyncIO().read(source), "# A\n")
+
+  def test_prefetched_reads(self):
+    sources = [self.write(f"{idx}.md", f"# {idx}\n") for idx in range(5)]
+    io = ThreadedIO(workers=2, window=2)
+    io.prefetch(sources)
+    self.assertEqual([io.read(source) for source in sources], [f"# {idx}\n" for idx in range(5)])
+    self.assertEqual(io.close(), {})
+
+  def test_writes_are_atomic_and_create_directories_once(self):
+    for io in (SyncIO(), ThreadedIO(workers=2, window=1)):
+      dests = [self.path(type(io).__name__, "a", f"{idx}.html") for idx in range(3)]
+      io.make_dirs(dests)
+      for idx, dest in enumerate(dests):
+        io.write(dest, lambda f, idx=idx: f.write(f"page {idx}"))
+      self.assertEqual(io.close(), {})
+      self.assertEqual(io.directories, {os.path.dirname(dests[0])})
+      for idx, dest in enumerate(dests):
+        with open(dest) as f:
+          self.assertEqual(f.read(), f"page {idx}")
+      self.assertEqual(sorted(os.listdir(os.path.dirname(dests[0]))), ["0.html", "1.html", "2.html"])
+
+  def test_failed_render_keeps_previous_output(self):
+    dest = self.path("page.html")
+    with open(dest, "w") as f:
+      f.write("old")
+
+    def render(f):
+      f.write("partial")
+      raise ValueError("boom")
+
+    for io in (SyncIO(), ThreadedIO()):
+      with self.assertRaises(ValueError):
+        io.write(dest, render)
+      io.close()
+      with open(dest) as f:
+        self.assertEqual(f.read(), "old")
+      self.assertEqual(os.listdir(self.root), ["page.html"])
+
+  def test_failed_background_write_is_reported_on_close(self):
+    # A directory in the way only shows when the page is renamed into place
+    dest = self.path("page.html")
+    os.makedirs(os.path.join(dest, "child"))
+    io = ThreadedIO()
+    io.write(dest, lambda f: f.write("x"))
+    errors = io.close()
+    self.assertEqual(list(errors), [dest])
+    self.assertEqual(os.listdir(self.root), ["page.html"])
+
+  def test_unchanged_output_is_not_rewritten(self):
+    dest = self.path("page.html")
+    io = SyncIO()
+    io.write(dest, lambda f: f.write("same"))
+    digest, written = io.outcomes[dest]
+    self.assertTrue(written)
+    os.utime(dest, ns=(0, 1_000_000_000))
+
+    # With a stored digest the old output is never read
+    for io in (SyncIO({dest: digest}), ThreadedIO(digests={dest: digest}), SyncIO()):
+      io.write(dest, lambda f: f.write("same"))
+      io.close()
+      self.assertEqual(io.outcomes[dest], (digest, False))
+    self.assertEqual(os.stat(dest).st_mtime_ns, 1_000_000_000)
+
+    io = SyncIO({dest: digest})
+    io.write(dest, lambda f: f.write("different"))
+    self.assertTrue(io.outcomes[dest][1])
+    with open(dest) as f:
+      self.assertEqual(f.read(), "different")
+
+  def test_unchanged_streamed_output_is_not_replaced(self):
+    dest = self.path("page.html")
+    for io in (SyncIO(), SyncIO()):
+      io.write(dest, lambda f: f.write("streamed"))
+    self.assertEqual(io.outcomes[dest][1], False)
+    self.assertEqual(os.listdir(self.root), ["page.html"])
+    io = SyncIO({dest: io.outcomes[dest][0]})
+    io.write(dest, lambda f: f.write("streamed"))
+    self.assertEqual(io.outcomes[dest][1], False)
+    io.write(dest, lambda f: f.write("changed"))
+    self.assertEqual(io.outcomes[dest][1], True)
+
+  def test_threaded_write_is_not_buffered(self):
+    dest = self.path("page.html")
+    io = ThreadedIO(2)
+    seen = []
+    io.write(dest, lambda f: seen.append(type(f)) or f.write("streamed"))
+    self.assertEqual(io.close(), {})
+    self.assertNotEqual(seen, [StringIO])
+    self.assertEqual(io.outcomes[dest][1], True)
+    with open(dest) as f:
+      self.assertEqual(f.read(), "streamed")
+
+  def test_sync_write_is_not_buffered(self):
+    dest = self.path("page.html")
+    io = SyncIO()
+    seen = []
+    io.write(dest, lambda f: seen.append(type(f)) or f.write("page"))
+    self.assertNotEqual(seen, [StringIO])
+    self.assertEqual(io.outcomes[dest][1], True)
+    with open(dest) as f:
+      self.assertEqual(f.read(), "page")
+
+  def test_backends_render_identical_pages(self):
+    template_path = os.path.join(REPO_ROOT, "template.html")
+    outputs = []
+    for threads in (0, 3):
+      dest = self.path(f"docs{threads}")
+      jobs = collect_page_jobs(os.path.join(REPO_ROOT, "content"), dest)
+      with redirect_stdout(StringIO()):
+        self.assertEqual(generate_pages(jobs, template_path, io_threads=threads), [])
+      pages = {}
+      for source, dest_path in jobs:
+        with open(dest_path) as f:
+          pages[os.path.relpath(dest_path, dest)] = f.read()
+      outputs.append(pages)
+    self.assertEqual(outputs[0], outputs[1])
+    self.assertEqual(len(outputs[0]), 5)
+
+  def test_write_failure_is_charged_to_its_page(self):
+    template_path = os.path.join(REPO_ROOT, "template.html")
+    source = self.write("a.md", "# A\n\ntext\n")
+    blocker = self.write("blocker", "")
+    for threads in (0, 2):
+      with redirect_stdout(StringIO()):
+        errors = generate_pages([(source, os.path.join(blocker, "a.html"))], template_path, io_threads=threads)
+      self.assertEqual([path for path, _ in errors], [source])
@@ -0,0 +1,62 @@
+import gzip
+import os
+import unittest
+
+from fixtures import TempDirTestCase
+from precompress import CompressStats, available_encodings, collect_sources, discard_variants, precompress
+
+class TestPrecompress(TempDirTestCase):
+  def setUp(self):
+    super().setUp()
+    self.root = os.path.join(self.tmp.name, "docs")
+    self.state = os.path.join(self.tmp.name, "cache", "compressed.json")
+    self.write("index.html", "<p>hello</p>" * 100)
+    self.write("blog/post.html", "<p>post</p>" * 100)
+    self.write("static/index.css", "body { margin: 0 }\n" * 50)
+    self.write("static/images/a.png", "not text")
+
+  def test_gzip_always_available(self):
+    self.assertEqual(available_encodings()[0][0], ".gz")
+
+  def test_sources_are_pages_and_text_assets(self):
+    self.assertEqual(sorted(os.path.relpath(path, self.root) for path in collect_sources(self.root)),
+                     ["blog/post.html", "index.html", "static/index.css"])
+
+  def test_variants_written_and_skipped_when_unchanged(self):
+    encodings = [encoding for encoding in available_encodings() if encoding[0] == ".gz"]
+    stats, orphans = precompress(self.root, self.state, workers=2, encodings=encodings)
+    self.assertEqual((stats.compressed, stats.skipped, orphans), (3, 0, []))
+    with gzip.open(self.path("index.html.gz"), "rt") as f:
+      self.assertEqual(f.read(), "<p>hello</p>" * 100)
+    self.assertFalse(os.path.exists(self.path("static/images/a.png.gz")))
+    self.assertLess(stats.sizes[".gz"][1], stats.sizes[".gz"][0])
+
+    self.write("index.html", "<p>changed</p>" * 100)
+    os.remove(self.path("blog/post.html"))
+    stats, orphans = precompress(self.root, self.state, encodings=encodings)
+    self.assertEqual((stats.compressed, stats.skipped), (1, 1))
+    self.assertEqual(orphans, [self.path("blog/post.html.gz")])
+    with gzip.open(self.path("index.html.gz"), "rt") as f:
+      self.assertEqual(f.read(), "<p>changed</p>" * 100)
+
+  def test_incompressible_files_get_no_variant(self):
+    self.write("tiny.html", "x")
+    precompress(self.root, self.state, encodings=available_encodings()[:1])
+    self.assertFalse(os.path.exists(self.path("tiny.html.gz")))
+    self.assertTrue(os.path.exists(self.path("index.html.gz")))
+
+  def test_discard_variants(self):
+    precompress(self.root, self.state, encodings=available_encodings()[:1])
+    self.assertEqual(sorted(discard_variants(self.state)),
+                     [self.path("blog/post.html.gz"), self.path("index.html.gz"), self.path("static/index.css.gz")])
+    self.assertFalse(os.path.exists(self.state))
+    self.assertEqual(discard_variants(self.state), [])
+
+  def test_summary(self):
+    stats = CompressStats()
+    stats.compressed = 2
+    stats.sizes = {".gz": [1000, 250], ".br": [1000, 200]}
+    self.assertEqual(stats.summary(), "compressed 2 file(s) (.br 20%, .gz 25% of original size)")
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,76 @@
+import json
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+import config
+import profiler
+from fixtures import TempDirTestCase
+from page_generator import generate_page
+
+class TestProfiler(TempDirTestCase):
+  def setUp(self):
+    super().setUp()
+    self.previous_basepath = config.basepath
+    config.basepath = "/"
+    self.source = self.write("index.md", "# Title\n\nSome **bold** text\n\n- a\n- b")
+    self.template = self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+    profiler.take_profiles()
+
+  def tearDown(self):
+    profiler.enabled = False
+    profiler.take_profiles()
+    config.basepath = self.previous_basepath
+
+  def generate(self):
+    with redirect_stdout(StringIO()):
+      generate_page(self.source, self.template, self.path("out", "index.html"))
+
+  def test_disabled_records_nothing(self):
+    self.generate()
+    self.assertEqual(profiler.take_profiles(), [])
+
+  def test_enabled_records_page_stages(self):
+    profiler.enabled = True
+    self.generate()
+    collected = profiler.take_profiles()
+    self.assertEqual([profile.label for profile in collected], [self.source])
+    stages = collected[0].stages
+    for name in ("read", "blocks", "classify", "inline", "tree", "title", "serialize", "template_write"):
+      self.assertIn(name, stages)
+    self.assertEqual(stages["inline"][1], 4)
+    self.assertLessEqual(sum(seconds for seconds, _ in stages.values()), collected[0].total)
+
+  def test_nested_stages_are_exclusive(self):
+    @profiler.profiled("inner")
+    def inner():
+      return sum(range(1000))
+
+    @profiler.profiled("outer")
+    def outer():
+      return inner() + inner()
+
+    profiler.enabled = True
+    profiler.start("nested")
+    outer()
+    profiler.finish()
+    (profile,) = profiler.take_profiles()
+    self.assertEqual(profile.stages["inner"][1], 2)
+    self.assertEqual(profile.stages["outer"][1], 1)
+    total = profile.stages["inner"][0] + profile.stages["outer"][0]
+    self.assertLessEqual(total, profile.total)
+
+  def test_summary_and_trace(self):
+    profiler.enabled = True
+    self.generate()
+    collected = profiler.take_profiles()
+    self.assertIn("Slowest of 1 profiled item(s)", profiler.summary(collected))
+    trace_path = self.path("trace.json")
+    profiler.write_trace(collected, trace_path)
+    with open(trace_path) as f:
+      trace = json.load(f)
+    self.assertEqual(trace["profiles"][0]["label"], self.source)
+    self.assertIn("inline", trace["totals"])
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,100 @@
+import os
+import shutil
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+import config
+from fixtures import TempDirTestCase
+from manifest import Manifest
+from sharding import merge_shards, parse_shard, select_shard, shard_of
+from site_builder import build_site
+
+TEMPLATE = "<html><title>{{ Title }}</title><body>{{ Content }}</body></html>"
+
+class TestPartition(unittest.TestCase):
+  def test_parse_shard(self):
+    self.assertEqual(parse_shard("2/4"), (2, 4))
+    for spec in ("0/4", "5/4", "1/0", "a/b", "3"):
+      with self.subTest(spec=spec):
+        with self.assertRaises(ValueError):
+          parse_shard(spec)
+
+  def test_partition_is_deterministic_and_complete(self):
+    jobs = [(f"/a/content/section{idx}/index.md", f"/a/docs/section{idx}/index.html") for idx in range(200)]
+    shards = [select_shard(jobs, "/a/content", (index, 4)) for index in range(1, 5)]
+    self.assertEqual(sorted(job for shard in shards for job in shard), sorted(jobs))
+    self.assertTrue(all(shards))
+    # Independent of where the tree is checked out
+    self.assertEqual([shard_of(source, "/a/content", 4) for source, _ in jobs],
+                     [shard_of(source.replace("/a/", "/b/"), "/b/content", 4) for source, _ in jobs])
+
+
+class TestShardedBuild(TempDirTestCase):
+  def setUp(self):
+    super().setUp()
+    self.root = os.path.join(self.tmp.name, "site")
+    for idx in range(8):
+      self.write(f"content/page{idx}/index.md", f"# Page {idx}\n\nText [home](/)")
+    self.write("content/index.md", "# Home\n\nWelcome")
+    self.write("static/index.css", "body {}")
+    self.write("template.html", TEMPLATE)
+
+  def build(self, shard=None):
+    with redirect_stdout(StringIO()):
+      return build_site(self.path("content"), self.path("static"), self.path("template.html"), self.path("docs"),
+                        self.path(os.path.join(config.cache_dir, "manifest.json")), self.root + os.sep,
+                        full=True, shard=shard)
+
+  def build_shards(self, count, name="shard"):
+    roots = []
+    for index in range(1, count + 1):
+      stats = self.build((index, count))
+      self.assertEqual(stats.copied, 1 if index == 1 else 0)
+      shard_root = os.path.join(self.tmp.name, f"{name}{index}")
+      os.makedirs(shard_root)
+      shutil.move(self.path("docs"), shard_root)
+      shutil.move(self.path(config.cache_dir), shard_root)
+      roots.append(shard_root)
+    return roots
+
+  def read_tree(self, directory):
+    files = {}
+    for root, _, names in os.walk(directory):
+      for name in names:
+        with open(os.path.join(root, name)) as f:
+          files[os.path.relpath(os.path.join(root, name), directory)] = f.read()
+    return files
+
+  def merge(self, roots):
+    return merge_shards(roots, self.path("docs"), self.path(os.path.join(config.cache_dir, "manifest.json")))
+
+  def test_merged_shards_match_a_single_build(self):
+    self.build()
+    expected = self.read_tree(self.path("docs"))
+    expected_pages = Manifest.load(self.path(os.path.join(config.cache_dir, "manifest.json"))).pages
+    shutil.rmtree(self.path("docs"))
+    shutil.rmtree(self.path(config.cache_dir))
+
+    stats = self.merge(self.build_shards(3))
+    self.assertEqual(stats.conflicts, [])
+    self.assertEqual(self.read_tree(self.path("docs")), expected)
+    self.assertEqual(Manifest.load(self.path(os.path.join(config.cache_dir, "manifest.json"))).pages,
+                     expected_pages)
+
+  def test_conflicting_outputs_fail_without_writing(self):
+    roots = self.build_shards(2)
+    os.makedirs(os.path.join(roots[1], "docs", "static"))
+    with open(os.path.join(roots[1], "docs", "static", "index.css"), "w") as f:
+      f.write("body { color: red }")
+    stats = self.merge(roots)
+    self.assertEqual(len(stats.conflicts), 1)
+    self.assertIn("index.css", stats.conflicts[0])
+    self.assertFalse(os.path.exists(self.path("docs")))
+
+  def test_shards_from_different_templates_conflict(self):
+    first = self.build_shards(2)
+    self.write("template.html", "<main>" + TEMPLATE + "</main>")
+    second = self.build_shards(2, "rebuilt")
+    stats = self.merge([first[0], second[1]])
+    self.assertEqual(stats.conflicts, [f"{second[1]}: built from a different template.html"])
@@ -0,0 +1,261 @@
+import json
+import os
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+import config
+from depgraph import DependencyGraph
+from fixtures import TempDirTestCase
+from manifest import Manifest
+import site_builder
+from site_builder import build_site
+
+TEMPLATE = "<html><title>{{ Title }}</title><body>{{ Content }}</body></html>"
+
+class TestIncrementalBuild(TempDirTestCase):
+  def setUp(self):
+    super().setUp()
+    self.write("content/index.md", "# Home\n\nWelcome")
+    self.write("content/blog/post/index.md", "# Post\n\nSome **bold** text")
+    self.write("static/index.css", "body {}")
+    self.write("template.html", TEMPLATE)
+
+  def tearDown(self):
+    config.assets = None
+
+  def read(self, relative):
+    # Pages are compared byte for byte
+    with open(self.path(relative), "rb") as f:
+      return f.read()
+
+  def build(self, full=False, basepath="/", workers=1, fingerprint=False, compress=False, minify=False):
+    with redirect_stdout(StringIO()):
+      return build_site(
+        self.path("content"),
+        self.path("static"),
+        self.path("template.html"),
+        self.path("docs"),
+        self.path(".ssg-cache/manifest.json"),
+        basepath,
+        full=full,
+        workers=workers,
+        fingerprint=fingerprint,
+        compress=compress,
+        minify=minify,
+      )
+
+  def test_first_build_generates_everything(self):
+    stats = self.build()
+    self.assertEqual(stats.generated, 2)
+    self.assertEqual(stats.copied, 1)
+    self.assertTrue(os.path.exists(self.path("docs/blog/post/index.html")))
+    self.assertTrue(os.path.exists(self.path("docs/static/index.css")))
+
+  def test_unchanged_build_skips_everything(self):
+    self.build()
+    stats = self.build()
+    self.assertEqual(stats.generated, 0)
+    self.assertEqual(stats.copied, 0)
+    self.assertEqual(stats.skipped, 3)
+
+  def test_only_changed_page_is_regenerated(self):
+    self.build()
+    self.write("content/index.md", "# Home\n\nWelcome back")
+    stats = self.build()
+    self.assertEqual(stats.generated, 1)
+    with open(self.path("docs/index.html")) as f:
+      self.assertIn("Welcome back", f.read())
+
+  def test_template_change_invalidates_all_pages(self):
+    self.build()
+    self.write("template.html", "<main>" + TEMPLATE + "</main>")
+    stats = self.build()
+    self.assertEqual(stats.generated, 2)
+
+  def test_renderer_change_invalidates_all_pages(self):
+    self.build()
+    with mock.patch.object(site_builder, "PARSER_VERSION", site_builder.PARSER_VERSION + 1):
+      self.assertEqual(self.build().generated, 2)
+      self.assertEqual(self.build().generated, 0)
+    previous = config.inline_tokenizer
+    config.inline_tokenizer = "pipeline"
+    try:
+      self.assertEqual(self.build().generated, 2)
+    finally:
+      config.inline_tokenizer = previous
+
+  def test_identical_rerender_keeps_output_untouched(self):
+    self.assertEqual(self.build().written, 2)
+    os.utime(self.path("docs/index.html"), ns=(0, 1_000_000_000))
+    self.write("content/index.md", "# Home\n\n\nWelcome\n")
+    stats = self.build()
+    self.assertEqual((stats.generated, stats.written, stats.identical), (1, 0, 1))
+    self.assertEqual(os.stat(self.path("docs/index.html")).st_mtime_ns, 1_000_000_000)
+
+    self.write("content/index.md", "# Home\n\nWelcome back")
+    stats = self.build()
+    self.assertEqual((stats.written, stats.identical), (1, 0))
+    self.assertIn(b"Welcome back", self.read("docs/index.html"))
+
+  def test_references_drive_rebuilds(self):
+    self.write("content/index.md", "# Home\n\n![logo](/images/logo.png) see [post](/blog/post)")
+    self.write("static/images/logo.png", "png")
+    self.build()
+    manifest = Manifest.load(self.path(".ssg-cache/manifest.json"))
+    graph = DependencyGraph.from_pages(manifest.pages)
+    self.assertEqual(graph.dependents(self.path("static/images/logo.png")), [self.path("docs/index.html")])
+    self.assertEqual(graph.dependents(self.path("content/blog/post/index.md")),
+                     [self.path("docs/blog/post/index.html"), self.path("docs/index.html")])
+
+    # Editing the linked page does not touch the page linking to it
+    self.write("content/blog/post/index.md", "# Post\n\nEdited")
+    self.assertEqual(self.build().generated, 1)
+    # Removing a referenced file does
+    os.remove(self.path("static/images/logo.png"))
+    self.assertEqual(self.build().generated, 1)
+    self.assertEqual(self.build().generated, 0)
+
+  def test_broken_references_are_reported(self):
+    self.write("content/index.md", "# Home\n\n![logo](/images/logo.png) see [post](/blog/post) and [gone](/blog/gone)")
+    stats = self.build()
+    self.assertEqual(stats.broken, [(self.path("content/index.md"), "/blog/gone"),
+                                    (self.path("content/index.md"), "/static/images/logo.png")])
+    # Still reported when the page is skipped as up to date
+    stats = self.build()
+    self.assertEqual(stats.generated, 0)
+    self.assertEqual(len(stats.broken), 2)
+    self.write("static/images/logo.png", "png")
+    stats = self.build()
+    self.assertEqual(stats.generated, 1)
+    self.assertEqual(stats.broken, [(self.path("content/index.md"), "/blog/gone")])
+
+  def test_fingerprinted_assets(self):
+    self.write("content/index.md", "# Home\n\n![logo](/images/logo.png)")
+    self.write("static/images/logo.png", "png")
+    self.write("template.html", '<link href="static/index.css">' + TEMPLATE)
+    stats = self.build(fingerprint=True)
+    with open(self.path("docs/assets.json")) as f:
+      assets = json.load(f)
+    self.assertEqual(sorted(os.listdir(self.path("docs/static/images"))), [assets["images/logo.png"].split("/")[1]])
+    self.assertFalse(os.path.exists(self.path("docs/static/index.css")))
+    page = self.read("docs/index.html").decode()
+    self.assertIn(f'href="/static/{assets["index.css"]}"', page)
+    self.assertIn(f'src="/static/{assets["images/logo.png"]}"', page)
+    self.assertEqual(stats.broken, [])
+
+    # Only pages using a changed asset are rebuilt, under its new name
+    self.assertEqual(self.build(fingerprint=True).generated, 0)
+    self.write("static/images/logo.png", "new png")
+    stats = self.build(fingerprint=True)
+    self.assertEqual(stats.generated, 1)
+    self.assertEqual(stats.removed, 1)
+    with open(self.path("docs/assets.json")) as f:
+      self.assertNotEqual(json.load(f)["images/logo.png"], assets["images/logo.png"])
+
+    # Turning fingerprinting off restores the plain names everywhere
+    self.assertEqual(self.build().generated, 2)
+    self.assertFalse(os.path.exists(self.path("docs/assets.json")))
+    self.assertIn('src="/static/images/logo.png"', self.read("docs/index.html").decode())
+    self.assertEqual(os.listdir(self.path("docs/static/images")), ["logo.png"])
+
+  def test_precompressed_variants_follow_outputs(self):
+    self.write("static/index.css", "body { margin: 0 }\n" * 20)
+    stats = self.build(compress=True)
+    self.assertEqual(stats.compression.compressed, 3)
+    self.assertTrue(os.path.exists(self.path("docs/static/index.css.gz")))
+    self.assertTrue(os.path.exists(self.path("docs/index.html.gz")))
+    self.assertIn("compressed 3 file(s)", stats.summary())
+
+    # Static sync leaves the variants alone and unchanged files are skipped
+    stats = self.build(compress=True)
+    self.assertEqual((stats.compression.compressed, stats.removed), (0, 0))
+    self.write("content/blog/post/index.md", "# Post\n\n" + "Longer text. " * 20)
+    stats = self.build(compress=True)
+    self.assertEqual(stats.compression.compressed, 1)
+    self.assertTrue(os.path.exists(self.path("docs/blog/post/index.html.gz")))
+
+    os.remove(self.path("content/blog/post/index.md"))
+    self.build(compress=True)
+    self.assertFalse(os.path.exists(self.path("docs/blog")))
+    # Turning precompression off removes the remaining variants
+    stats = self.build()
+    self.assertEqual(stats.removed, 2)
+    self.assertFalse(os.path.exists(self.path("docs/index.html.gz")))
+    self.assertFalse(os.path.exists(self.path("docs/static/index.css.gz")))
+
+  def test_minified_pages(self):
+    self.write("template.html", "<html>\n  <title>{{ Title }}</title>\n  <body>{{ Content }}</body>\n</html>\n")
+    self.write("content/index.md", "# Home\n\n```\ncode  stays\n```")
+    self.build()
+    plain = self.read("docs/index.html")
+    stats = self.build(minify=True)
+    self.assertEqual(stats.generated, 2)
+    page = self.read("docs/index.html")
+    self.assertEqual(page, b"<html><title>Home</title><body><div><h1>Home</h1><pre><code>code  stays\n</code></pre></div></body></html>")
+    self.assertEqual(stats.minified, 2 * (len(plain) - len(page)))
+    self.assertIn(f"minifying saved {stats.minified} byte(s)", stats.summary())
+    self.assertEqual(self.build(minify=True).generated, 0)
+    self.assertEqual(self.build().generated, 2)
+    self.assertEqual(self.read("docs/index.html"), plain)
+
+  def test_basepath_change_invalidates_every_page(self):
+    self.build()
+    stats = self.build(basepath="/other/")
+    self.assertEqual(stats.generated, 2)
+
+  def test_deleted_source_removes_output(self):
+    self.build()
+    os.remove(self.path("content/blog/post/index.md"))
+    stats = self.build()
+    self.assertEqual(stats.removed, 1)
+    self.assertFalse(os.path.exists(self.path("docs/blog")))
+    self.assertTrue(os.path.exists(self.path("docs/index.html")))
+
+  def test_missing_output_is_regenerated(self):
+    self.build()
+    os.remove(self.path("docs/index.html"))
+    stats = self.build()
+    self.assertEqual(stats.generated, 1)
+
+  def test_full_build_wipes_unknown_outputs(self):
+    self.build()
+    self.write("docs/leftover.html", "old")
+    stats = self.build(full=True)
+    self.assertEqual(stats.generated, 2)
+    self.assertFalse(os.path.exists(self.path("docs/leftover.html")))
+
+  def test_corrupt_manifest_is_ignored(self):
+    self.write(".ssg-cache/manifest.json", "{not json")
+    manifest = Manifest.load(self.path(".ssg-cache/manifest.json"))
+    self.assertEqual(manifest.pages, {})
+    self.assertEqual(self.build().generated, 2)
+
+  def test_parallel_build_matches_serial_output(self):
+    self.build(full=True)
+    serial = [self.read("docs/index.html"), self.read("docs/blog/post/index.html")]
+    stats = self.build(full=True, workers=2)
+    self.assertEqual(stats.generated, 2)
+    self.assertEqual([self.read("docs/index.html"), self.read("docs/blog/post/index.html")], serial)
+
+  def test_failing_page_does_not_abort_build(self):
+    self.write("content/broken.md", "no title here")
+    stats = self.build(workers=2)
+    self.assertEqual(stats.generated, 2)
+    self.assertEqual([source for source, _ in stats.errors], [self.path("content/broken.md")])
+    self.assertIn("No h1 header found", stats.errors[0][1])
+    # The failed page is not recorded, so the next build retries it
+    self.assertEqual(len(self.build().errors), 1)
+
+  def test_parallel_build_checks_every_page(self):
+    for idx in range(6):
+      self.write(f"content/page{idx}/index.md", f"# Page {idx}\n\n[gone](/gone{idx}) and [post](/blog/post)")
+    self.write("content/page3/broken.md", "no title here")
+    stats = self.build(workers=2)
+    self.assertEqual(stats.generated, 8)
+    self.assertEqual([source for source, _ in stats.errors], [self.path("content/page3/broken.md")])
+    self.assertEqual(stats.broken, [(self.path(f"content/page{idx}/index.md"), f"/gone{idx}") for idx in range(6)])
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,89 @@
+import os
+import shutil
+import subprocess
+import sys
+
+from fixtures import TempDirTestCase
+from snapshot import discard_snapshot, is_unchanged, save_snapshot, take_snapshot
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(SRC_DIR)
+
+class TestSnapshot(TempDirTestCase):
+  def setUp(self):
+    super().setUp()
+    self.write("content/index.md", "# Home")
+    self.write("template.html", "{{ Content }}")
+    self.paths = [self.path("content"), self.path("template.html"), self.path("missing")]
+    self.snapshot_path = self.path(".ssg-cache/snapshot.json")
+
+  def record(self):
+    save_snapshot(self.snapshot_path, "/", take_snapshot(self.paths))
+
+  def test_snapshot_lists_files(self):
+    self.assertEqual(sorted(take_snapshot(self.paths)), [self.path("content/index.md"), self.path("template.html")])
+
+  def test_unchanged_tree(self):
+    self.record()
+    self.assertTrue(is_unchanged(self.snapshot_path, "/", self.paths))
+    self.assertFalse(is_unchanged(self.snapshot_path, "/other/", self.paths))
+    discard_snapshot(self.snapshot_path)
+    self.assertFalse(is_unchanged(self.snapshot_path, "/", self.paths))
+
+  def test_unreadable_entries_are_skipped(self):
+    # A dangling link stands in for a file removed between listing and stat
+    os.symlink(self.path("content/gone.md"), self.path("content/link.md"))
+    self.assertEqual(sorted(take_snapshot(self.paths)), [self.path("content/index.md"), self.path("template.html")])
+
+  def test_changes_are_detected(self):
+    changes = [
+      lambda: self.write("content/index.md", "# Home!"),
+      lambda: os.utime(self.path("template.html"), ns=(0, 0)),
+      lambda: self.write("content/new.md", "# New"),
+      lambda: os.remove(self.path("content/new.md")),
+    ]
+    for change in changes:
+      self.record()
+      change()
+      self.assertFalse(is_unchanged(self.snapshot_path, "/", self.paths))
+
+
+class TestNoOpBuild(TempDirTestCase):
+  def setUp(self):
+    super().setUp()
+    self.basepath = self.root + os.sep
+    for name in ("content", "static"):
+      shutil.copytree(os.path.join(REPO_ROOT, name), self.path(name))
+    shutil.copy(os.path.join(REPO_ROOT, "template.html"), self.root)
+
+  def run_main(self, *argv, setup=""):
+    # Reports whether the parser modules were imported; setup runs before main is imported
+    code = f"{setup}import sys, main; main.main({[self.basepath, *argv]!r}); print('htmlnode' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=SRC_DIR, capture_output=True, text=True, check=True)
+    return result.stdout.splitlines()
+
+  def test_second_build_takes_the_fast_path(self):
+    self.assertEqual(self.run_main()[-1], "True")
+    self.assertEqual(self.run_main(), ["Nothing changed since the last build", "False"])
+
+    os.utime(self.path("content", "index.md"))
+    lines = self.run_main()
+    self.assertIn("skipped 10 unchanged", lines[-2])
+    self.assertEqual(lines[-1], "False")
+
+    os.remove(self.path("docs", "index.html"))
+    self.assertIn("Generated 1 page(s)", self.run_main()[-2])
+    self.assertIn("Generated 5 page(s)", self.run_main("--full")[-2])
+
+  def test_profiled_build_skips_the_fast_path(self):
+    self.run_main()
+    trace_path = self.path("trace.json")
+    for argv in (["--profile"], ["--trace", trace_path]):
+      self.assertNotIn("Nothing changed since the last build", self.run_main(*argv))
+    self.assertTrue(os.path.exists(trace_path))
+
+  def test_renderer_change_skips_the_fast_path(self):
+    self.run_main()
+    for setup in ("import body_cache; body_cache.PARSER_VERSION += 1; ",
+                  "import config; config.inline_tokenizer = 'pipeline'; "):
+      self.assertIn("Generated 5 page(s)", self.run_main(setup=setup)[-2])
@@ -2,7 +2,8 @@
 import unittest
 from enum import Enum
 
-from htmlnode import HTMLNode, LeafNode, ParentNode, text_node_to_html_node
+import config
+from htmlnode import HTMLNode, LeafNode, ParentNode, markdown_to_html_node, text_node_to_html_node
 from textnode import TextNode, TextType
 from splitter import (
                       split_nodes_delimiter,
@@ -11,10 +12,12 @@ from splitter import (
                       split_nodes_image,
                       split_nodes_link,
                       text_to_textnodes,
+                      text_to_textnodes_pipeline,
+                      text_to_textnodes_scanner,
                       markdown_to_blocks
                     )
 
-from block import BlockType, block_to_block_type
+from block import BlockType, block_to_block_type, iter_blocks, scan_blocks
 
 
 class TestTextNode(unittest.TestCase):
@@ -189,43 +192,6 @@ class TestTextNode(unittest.TestCase):
           new_nodes,
       )
 
-  def test_text_to_textnodes_basic_formatting(self):
-      text = "This is **bold** text"
-      nodes = text_to_textnodes(text)
-      expected = [
-          TextNode("This is ", TextType.TEXT),
-          TextNode("bold", TextType.BOLD),
-          TextNode(" text", TextType.TEXT),
-      ]
-      self.assertListEqual(expected, nodes)
-
-  def test_text_to_textnodes_all_formats(self):
-      text = (
-          "This is **text** with an _italic_ word and a `code block` "
-          "and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) "
-          "and a [link](https://boot.dev)"
-      )
-      nodes = text_to_textnodes(text)
-      expected = [
-          TextNode("This is ", TextType.TEXT),
-          TextNode("text", TextType.BOLD),
-          TextNode(" with an ", TextType.TEXT),
-          TextNode("italic", TextType.ITALIC),
-          TextNode(" word and a ", TextType.TEXT),
-          TextNode("code block", TextType.CODE),
-          TextNode(" and an ", TextType.TEXT),
-          TextNode("obi wan image", TextType.IMAGE, "https://i.imgur.com/fJRm4Vk.jpeg"),
-          TextNode(" and a ", TextType.TEXT),
-          TextNode("link", TextType.LINK, "https://boot.dev"),
-      ]
-      self.assertListEqual(expected, nodes)
-
-  def test_text_to_textnodes_no_formatting(self):
-      text = "Just plain text without any formatting."
-      nodes = text_to_textnodes(text)
-      expected = [TextNode(text, TextType.TEXT)]
-      self.assertListEqual(expected, nodes)
-
   def test_markdown_to_blocks(self):
         md = """
 This is **bolded** paragraph
@@ -323,6 +289,177 @@ Paragraph with trailing spaces.
       result = block_to_block_type(markdown)
       assert result == BlockType.PARAGRAPH
 
+
+class TestBlockScanner(unittest.TestCase):
+  def test_markdown_to_blocks_crlf_line_endings(self):
+      md = "# Title\r\n\r\nFirst line\r\nsecond line\r\n\r\n- a\r\n- b\r\n"
+      self.assertEqual(markdown_to_blocks(md), ["# Title", "First line\nsecond line", "- a\n- b"])
+
+  def test_markdown_to_blocks_whitespace_only_separator(self):
+      md = "Paragraph one.\n   \n\t\nParagraph two."
+      self.assertEqual(markdown_to_blocks(md), ["Paragraph one.", "Paragraph two."])
+
+  def test_scan_blocks_classifies_and_splits_lines(self):
+      md = "## Heading\n\n> quote 1\n> quote 2\n\n1. one\n2. two\n\n```\ncode\n```\n\n  text  "
+      self.assertEqual(
+          scan_blocks(md),
+          [
+              (BlockType.HEADING, ["## Heading"]),
+              (BlockType.QUOTE, ["> quote 1", "> quote 2"]),
+              (BlockType.ORDERED_LIST, ["1. one", "2. two"]),
+              (BlockType.CODE, ["```", "code", "```"]),
+              (BlockType.PARAGRAPH, ["text"]),
+          ],
+      )
+
+  def test_iter_blocks_accepts_file_lines(self):
+      lines = ["# Title\n", "\n", "- a\n", "- b\n"]
+      self.assertEqual(
+          list(iter_blocks(lines)),
+          [(BlockType.HEADING, ["# Title"]), (BlockType.UNORDERED_LIST, ["- a", "- b"])],
+      )
+
+  def test_blank_lines_inside_fence_stay_in_code_block(self):
+      md = "```\ndef f():\n    x = 1\n    \n\n    return x\n```\n\nafter"
+      self.assertEqual(
+          scan_blocks(md),
+          [
+              (BlockType.CODE, ["```", "def f():", "    x = 1", "    ", "", "    return x", "```"]),
+              (BlockType.PARAGRAPH, ["after"]),
+          ],
+      )
+      html = markdown_to_html_node(md).to_html()
+      self.assertIn("<pre><code>def f():\n    x = 1\n    \n\n    return x\n</code></pre>", html)
+
+  def test_mixed_list_markers_are_a_paragraph(self):
+      self.assertEqual(block_to_block_type("- a\n1. b"), BlockType.PARAGRAPH)
+
+class TextToTextNodesCases:
+  # Run once per inline tokenizer by the subclasses below
+  tokenizer = None
+
+  def setUp(self):
+      self.previous_tokenizer = config.inline_tokenizer
+      config.inline_tokenizer = self.tokenizer
+
+  def tearDown(self):
+      config.inline_tokenizer = self.previous_tokenizer
+
+  def test_text_to_textnodes_basic_formatting(self):
+      text = "This is **bold** text"
+      nodes = text_to_textnodes(text)
+      expected = [
+          TextNode("This is ", TextType.TEXT),
+          TextNode("bold", TextType.BOLD),
+          TextNode(" text", TextType.TEXT),
+      ]
+      self.assertListEqual(expected, nodes)
+
+  def test_text_to_textnodes_all_formats(self):
+      text = (
+          "This is **text** with an _italic_ word and a `code block` "
+          "and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) "
+          "and a [link](https://boot.dev)"
+      )
+      nodes = text_to_textnodes(text)
+      expected = [
+          TextNode("This is ", TextType.TEXT),
+          TextNode("text", TextType.BOLD),
+          TextNode(" with an ", TextType.TEXT),
+          TextNode("italic", TextType.ITALIC),
+          TextNode(" word and a ", TextType.TEXT),
+          TextNode("code block", TextType.CODE),
+          TextNode(" and an ", TextType.TEXT),
+          TextNode("obi wan image", TextType.IMAGE, "https://i.imgur.com/fJRm4Vk.jpeg"),
+          TextNode(" and a ", TextType.TEXT),
+          TextNode("link", TextType.LINK, "https://boot.dev"),
+      ]
+      self.assertListEqual(expected, nodes)
+
+  def test_text_to_textnodes_no_formatting(self):
+      text = "Just plain text without any formatting."
+      nodes = text_to_textnodes(text)
+      expected = [TextNode(text, TextType.TEXT)]
+      self.assertListEqual(expected, nodes)
+
+class TestTextToTextNodesScanner(TextToTextNodesCases, unittest.TestCase):
+  tokenizer = "scanner"
+
+class TestTextToTextNodesPipeline(TextToTextNodesCases, unittest.TestCase):
+  tokenizer = "pipeline"
+
+class TestInlineTokenizers(unittest.TestCase):
+  # Edge cases beyond the TextToTextNodesCases ones, compared across tokenizers
+  SAMPLES = [
+      "**bold at start** and _italic at end_",
+      "**a****b**",
+      "**bold with _underscores_ inside**",
+      "![image](https://i.imgur.com/zjjcJKZ.png)[link](https://example.com)",
+      "Not an image !![alt](http://example.com/a.png) and [a] (b)",
+      "",
+  ]
+  # Higher-priority delimiters split first, so the second and third leave a
+  # lone delimiter in one of the remaining text segments
+  UNMATCHED = ["an `unmatched code", "a **b** _c **d** e_", "`code with **stars** inside`"]
+
+  def test_scanner_matches_pipeline(self):
+      for text in self.SAMPLES:
+          with self.subTest(text=text):
+              self.assertListEqual(text_to_textnodes_pipeline(text), text_to_textnodes_scanner(text))
+
+  def test_unmatched_delimiters_raise_in_both(self):
+      for text in self.UNMATCHED:
+          for tokenize in (text_to_textnodes_pipeline, text_to_textnodes_scanner):
+              with self.subTest(text=text, tokenize=tokenize.__name__):
+                  with self.assertRaises(ValueError):
+                      tokenize(text)
+
+  def test_repeated_links(self):
+      text = "[a](/x) then [a](/x) again"
+      for tokenize in (text_to_textnodes_pipeline, text_to_textnodes_scanner):
+          with self.subTest(tokenize=tokenize.__name__):
+              self.assertListEqual(
+                  [
+                      TextNode("a", TextType.LINK, "/x"),
+                      TextNode(" then ", TextType.TEXT),
+                      TextNode("a", TextType.LINK, "/x"),
+                      TextNode(" again", TextType.TEXT),
+                  ],
+                  tokenize(text),
+              )
+
+  def test_regex_metacharacters_in_urls(self):
+      text = "See [docs (v2)?](https://example.com/?q=a+b*) now"
+      for tokenize in (text_to_textnodes_pipeline, text_to_textnodes_scanner):
+          with self.subTest(tokenize=tokenize.__name__):
+              self.assertListEqual(
+                  [
+                      TextNode("See ", TextType.TEXT),
+                      TextNode("docs (v2)?", TextType.LINK, "https://example.com/?q=a+b*"),
+                      TextNode(" now", TextType.TEXT),
+                  ],
+                  tokenize(text),
+              )
+
+  def test_repeated_images(self):
+      text = "![a](/a.png)![a](/a.png) and ![a](/a.png)"
+      self.assertListEqual(
+          [
+              TextNode("a", TextType.IMAGE, "/a.png"),
+              TextNode("a", TextType.IMAGE, "/a.png"),
+              TextNode(" and ", TextType.TEXT),
+              TextNode("a", TextType.IMAGE, "/a.png"),
+          ],
+          split_nodes_image([TextNode(text, TextType.TEXT)]),
+      )
+
+  def test_link_dense_paragraph(self):
+      text = " ".join(f"[l{idx % 7}](/p/{idx % 3}?x=*)" for idx in range(2000))
+      nodes = split_nodes_link([TextNode(text, TextType.TEXT)])
+      self.assertEqual(len(nodes), 3999)
+      self.assertEqual(nodes[-1], TextNode("l4", TextType.LINK, "/p/1?x=*"))
+      self.assertListEqual(nodes, text_to_textnodes_scanner(text))
+
 if __name__ == "__main__":
   unittest.main()
 
@@ -0,0 +1,68 @@
+import os
+import unittest
+
+from fixtures import TempDirTestCase
+from static_sync import sync_directory
+
+class TestStaticSync(TempDirTestCase):
+  def setUp(self):
+    super().setUp()
+    self.source = self.path("static")
+    self.dest = self.path("docs", "static")
+    self.write("static/index.css", "body {}")
+    self.write("static/images/a.png", "aaaa")
+    self.write("static/images/b.png", "bbbb")
+
+  def test_initial_sync_copies_everything(self):
+    stats = sync_directory(self.source, self.dest)
+    self.assertEqual(stats.copied, 3)
+    self.assertEqual(self.read("docs/static/images/a.png"), "aaaa")
+
+  def test_second_sync_skips_unchanged(self):
+    sync_directory(self.source, self.dest)
+    stats = sync_directory(self.source, self.dest)
+    self.assertEqual((stats.copied, stats.skipped), (0, 3))
+
+  def test_changed_file_is_recopied(self):
+    sync_directory(self.source, self.dest)
+    self.write("static/images/a.png", "changed")
+    stats = sync_directory(self.source, self.dest, workers=1)
+    self.assertEqual(stats.copied, 1)
+    self.assertEqual(self.read("docs/static/images/a.png"), "changed")
+
+  def test_checksum_detects_same_size_same_mtime_change(self):
+    sync_directory(self.source, self.dest)
+    dest_path = os.path.join(self.dest, "images/a.png")
+    stat = os.stat(dest_path)
+    with open(dest_path, "w") as f:
+      f.write("zzzz")
+    os.utime(dest_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    self.assertEqual(sync_directory(self.source, self.dest).copied, 0)
+    self.assertEqual(sync_directory(self.source, self.dest, checksum=True).copied, 1)
+    self.assertEqual(self.read("docs/static/images/a.png"), "aaaa")
+
+  def test_touched_but_identical_file_is_not_rewritten(self):
+    sync_directory(self.source, self.dest)
+    dest_path = os.path.join(self.dest, "images/a.png")
+    os.utime(dest_path, ns=(0, 1_000_000_000))
+    self.write("static/images/a.png", "aaaa")
+    stats = sync_directory(self.source, self.dest)
+    self.assertEqual((stats.copied, stats.skipped), (0, 3))
+    self.assertEqual(os.stat(dest_path).st_mtime_ns, 1_000_000_000)
+
+  def test_orphans_are_removed(self):
+    sync_directory(self.source, self.dest)
+    os.remove(os.path.join(self.source, "images/b.png"))
+    os.remove(os.path.join(self.source, "images/a.png"))
+    stats = sync_directory(self.source, self.dest)
+    self.assertEqual(stats.removed, 2)
+    self.assertFalse(os.path.exists(os.path.join(self.dest, "images")))
+
+  def test_link_mode_hardlinks(self):
+    stats = sync_directory(self.source, self.dest, link=True)
+    self.assertEqual(stats.linked, 3)
+    source_stat = os.stat(os.path.join(self.source, "index.css"))
+    self.assertEqual(os.stat(os.path.join(self.dest, "index.css")).st_ino, source_stat.st_ino)
+
+if __name__ == "__main__":
+  unittest.main()
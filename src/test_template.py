@@ -0,0 +1,58 @@
+import unittest
+from io import StringIO
+
+from template import Template, root_folder_for
+
+class TestTemplate(unittest.TestCase):
+  def test_render_fills_slots(self):
+    template = Template("<title>{{ Title }}</title><body>{{ Content }}</body>")
+    html = template.render(Title="Hello", Content="<p>World</p>")
+    self.assertEqual(html, "<title>Hello</title><body><p>World</p></body>")
+
+  def test_slots_are_split_at_compile_time(self):
+    template = Template("a{{ Title }}b{{Content}}c")
+    self.assertEqual(template.literals, ["a", "b", "c"])
+    self.assertEqual([name for name, _ in template.slots], ["Title", "Content"])
+
+  def test_repeated_and_custom_slots(self):
+    template = Template("{{ Title }} - {{ Author }} - {{ Title }}")
+    self.assertEqual(template.render(Title="T", Author="A"), "T - A - T")
+
+  def test_missing_value_keeps_placeholder(self):
+    template = Template("<h1>{{ Title }}</h1>{{ Unknown }}")
+    self.assertEqual(template.render(Title="T"), "<h1>T</h1>{{ Unknown }}")
+
+  def test_template_urls_rewritten_at_compile_time(self):
+    template = Template('<link href="static/index.css" /><a href="/">{{ Title }}</a>', "/site")
+    self.assertEqual(template.literals[0], '<link href="/site/static/index.css" /><a href="/site/">')
+
+  def test_template_urls_resolved_at_compile_time(self):
+    template = Template('<link href="static/a.css"><a href="/">h</a><img src="/logo.png"/>{{ Content }}', "/site")
+    self.assertEqual(template.literals[0],
+                     '<link href="/site/static/a.css"><a href="/site/">h</a><img src="/site/static/logo.png"/>')
+
+  def test_content_is_passed_verbatim(self):
+    # Body URLs are resolved when the nodes are built, and text that merely
+    # looks like an attribute is left alone
+    template = Template("{{ Content }}", "/site")
+    content = '<a href="/site/blog">x</a><code>href="/blog"</code>'
+    self.assertEqual(template.render(Content=content), content)
+
+  def test_write_streams_chunked_values(self):
+    template = Template("<title>{{ Title }}</title>{{ Content }}", "/site")
+    buffer = StringIO()
+    template.write(buffer, Title="T", Content=iter(['<a href="/x">', "y", "</a>"]))
+    self.assertEqual(buffer.getvalue(), '<title>T</title><a href="/x">y</a>')
+
+  def test_minified_at_compile_time(self):
+    source = "<html>\n  <title>{{ Title }}</title>\n  <!-- c -->\n  <body>{{ Content }}</body>\n</html>\n"
+    template = Template(source, minify=True)
+    self.assertEqual(template.render(Title="T", Content="<p>x</p>"), "<html><title>T</title><body><p>x</p></body></html>")
+    self.assertEqual(template.saved, len(source) - len("<html><title>{{ Title }}</title><body>{{ Content }}</body></html>"))
+
+  def test_root_folder_for(self):
+    self.assertEqual(root_folder_for("/"), "")
+    self.assertEqual(root_folder_for("/github.com/user/static-site-generator/"), "/static-site-generator")
+
+if __name__ == "__main__":
+  unittest.main()
@@ -19,6 +19,12 @@ class TestTextNode(unittest.TestCase):
     node2 = TextNode("This is a link node", TextType.LINK, "https://www.boot.dev")
     self.assertNotEqual(node, node2)
 
+  def test_slotted(self):
+    node = TextNode("This is a text node", TextType.TEXT)
+    self.assertFalse(hasattr(node, "__dict__"))
+    with self.assertRaises(AttributeError):
+      node.extra = "not allowed"
+
 if __name__ == "__main__":
   unittest.main()
 
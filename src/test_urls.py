@@ -0,0 +1,36 @@
+import unittest
+
+from urls import UrlResolver, resolver_for
+
+class TestUrlResolver(unittest.TestCase):
+  def test_site_urls(self):
+    resolver = UrlResolver("/site")
+    self.assertEqual(resolver.href("/blog"), "/site/blog")
+    self.assertEqual(resolver.href("static/index.css"), "/site/static/index.css")
+    self.assertEqual(resolver.href("/static/index.css"), "/site/static/index.css")
+    self.assertEqual(resolver.src("/images/a.png"), "/site/static/images/a.png")
+    self.assertEqual(resolver.href("https://example.com/"), "https://example.com/")
+    self.assertEqual(resolver.src("a.png"), "a.png")
+
+  def test_static_urls_use_fingerprinted_names(self):
+    resolver = UrlResolver("/site", {"index.css": "index.1234.css", "images/a.png": "images/a.5678.png"})
+    self.assertEqual(resolver.href("static/index.css?v=2"), "/site/static/index.1234.css?v=2")
+    self.assertEqual(resolver.href("/static/index.css"), "/site/static/index.1234.css")
+    self.assertEqual(resolver.src("/images/a.png#x"), "/site/static/images/a.5678.png#x")
+    self.assertEqual(resolver.src("/images/unknown.png"), "/site/static/images/unknown.png")
+    self.assertEqual(resolver.href("/index.css"), "/site/index.css")
+
+  def test_key_changes_with_the_asset_map(self):
+    self.assertEqual(UrlResolver("/site").key, "/site")
+    self.assertNotEqual(UrlResolver("/site", {"a": "a.1"}).key, UrlResolver("/site", {"a": "a.2"}).key)
+
+  def test_resolver_for_reuses_resolver(self):
+    assets = {"a": "a.1"}
+    resolver = resolver_for("/srv/site/", assets)
+    self.assertIs(resolver_for("/srv/site/", assets), resolver)
+    self.assertEqual(resolver.root_folder, "/site")
+    self.assertIsNot(resolver_for("/srv/site/", {"a": "a.1"}), resolver)
+    self.assertIsNone(resolver_for("/srv/site/").assets)
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,126 @@
+import os
+import unittest
+import urllib.error
+import urllib.request
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+import config
+from fixtures import TempDirTestCase
+from watcher import SiteRequestHandler, SiteWatcher, diff_snapshots, start_server
+
+TEMPLATE = "<html><title>{{ Title }}</title><body>{{ Content }}</body></html>"
+
+class TestSiteWatcher(TempDirTestCase):
+  def setUp(self):
+    super().setUp()
+    self.previous_basepath = config.basepath
+    config.basepath = "/"
+    self.write("content/index.md", "# Home\n\nWelcome")
+    self.write("content/blog/post.md", "# Post\n\nText")
+    self.write("static/index.css", "body {}")
+    self.write("template.html", TEMPLATE)
+    self.watcher = SiteWatcher(self.path("content"), self.path("static"),
+                               self.path("template.html"), self.path("docs"))
+
+  def tearDown(self):
+    config.basepath = self.previous_basepath
+
+  def write(self, relative, text):
+    path = super().write(relative, text)
+    # Make the change visible even on filesystems with coarse timestamps
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+  def poll(self):
+    with redirect_stdout(StringIO()):
+      return self.watcher.poll()
+
+  def test_no_changes(self):
+    self.assertIsNone(self.poll())
+
+  def test_changed_page_is_rerendered(self):
+    self.write("content/blog/post.md", "# Post\n\nUpdated")
+    stats = self.poll()
+    self.assertEqual(stats.generated, 1)
+    self.assertIn("Updated", self.read("docs/blog/post.html"))
+    self.assertFalse(os.path.exists(self.path("docs/index.html")))
+
+  def test_template_change_rerenders_every_page(self):
+    self.write("template.html", "<main>" + TEMPLATE + "</main>")
+    stats = self.poll()
+    self.assertEqual(stats.generated, 2)
+    self.assertTrue(self.read("docs/index.html").startswith("<main>"))
+
+  def test_template_and_static_change_in_one_poll(self):
+    self.write("template.html", "<main>" + TEMPLATE + "</main>")
+    self.write("static/index.css", "body { margin: 0 }")
+    stats = self.poll()
+    self.assertEqual((stats.generated, stats.copied), (2, 1))
+    self.assertEqual(self.read("docs/static/index.css"), "body { margin: 0 }")
+
+  def test_minified_rebuilds(self):
+    self.watcher = SiteWatcher(self.path("content"), self.path("static"),
+                               self.path("template.html"), self.path("docs"), minify=True)
+    self.write("template.html", "<main>\n  " + TEMPLATE + "\n</main>\n")
+    self.write("content/blog/post.md", "# Post\n\nSome   text")
+    self.poll()
+    self.assertNotIn("\n", self.read("docs/blog/post.html"))
+    self.assertIn("Some text", self.read("docs/blog/post.html"))
+
+  def test_static_file_is_copied_and_removed(self):
+    self.write("static/images/a.png", "png")
+    self.assertEqual(self.poll().copied, 1)
+    self.assertEqual(self.read("docs/static/images/a.png"), "png")
+    os.remove(self.path("static/images/a.png"))
+    self.assertEqual(self.poll().removed, 1)
+    self.assertFalse(os.path.exists(self.path("docs/static/images")))
+
+  def test_broken_page_is_reported(self):
+    self.write("content/broken.md", "no title")
+    stats = self.poll()
+    self.assertEqual(len(stats.errors), 1)
+    self.assertIn("ms", stats.summary())
+
+  def test_server_mounts_docs_under_the_root_folder(self):
+    self.write("docs/static/index.css", "body {}")
+    self.write("docs/blog/tom/index.html", "tom")
+    with redirect_stdout(StringIO()):
+      server = start_server(self.path("docs"), 0, "/site")
+    self.addCleanup(server.server_close)
+    self.addCleanup(server.shutdown)
+    # Keep the request log out of the test output
+    patcher = mock.patch.object(SiteRequestHandler, "log_message")
+    patcher.start()
+    self.addCleanup(patcher.stop)
+    url = f"http://localhost:{server.server_address[1]}"
+
+    def get(path):
+      try:
+        with urllib.request.urlopen(url + path) as response:
+          return response.status, response.read().decode()
+      except urllib.error.HTTPError as e:
+        return e.code, None
+
+    self.assertEqual(get("/site/static/index.css"), (200, "body {}"))
+    # Directory redirects keep the prefix
+    self.assertEqual(get("/site/blog/tom"), (200, "tom"))
+    self.assertEqual(get("/static/index.css")[0], 404)
+    self.assertEqual(get("/sitemap/index.css")[0], 404)
+
+  def test_failed_static_copy_is_reported(self):
+    self.write("static/images/a.png", "png")
+    with mock.patch("watcher.copy_file", side_effect=FileNotFoundError("gone")):
+      stats = self.poll()
+    self.assertEqual(stats.copied, 0)
+    self.assertEqual(stats.errors, [(self.path("static/images/a.png"), "FileNotFoundError: gone")])
+    self.assertIn("1 file(s) failed", stats.summary())
+
+  def test_diff_snapshots(self):
+    changed, removed = diff_snapshots({"a": (1, 1), "b": (1, 1)}, {"a": (2, 1), "c": (1, 1)})
+    self.assertEqual(changed, ["a", "c"])
+    self.assertEqual(removed, ["b"])
+
+if __name__ == "__main__":
+  unittest.main()
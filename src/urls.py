@@ -0,0 +1,59 @@
+import hashlib
+import json
+import os
+import re
+
+# Everything before a URL's query or fragment
+PATH_PATTERN = re.compile(r"[^?#]*")
+
+def root_folder_for(basepath):
+  basepath = basepath.rstrip(os.sep)
+  return "/" + os.path.basename(basepath) if basepath else basepath
+
+
+class UrlResolver:
+  # Maps site-absolute URLs written in markdown and the template onto the
+  # folder the site is served from: links resolve under the root folder and
+  # images under its static/ directory. Other URLs are left alone. assets,
+  # if given, maps static files (relative to static/) to fingerprinted names.
+  def __init__(self, root_folder="", assets=None):
+    self.root_folder = root_folder
+    self.assets = assets
+    self.page_prefix = root_folder + "/"
+    self.static_prefix = root_folder + "/static/"
+    # Identifies the URLs this resolver produces, for caches of rendered HTML
+    self.key = root_folder
+    if assets is not None:
+      self.key += ":" + hashlib.sha256(json.dumps(assets, sort_keys=True).encode()).hexdigest()
+
+  def static(self, path):
+    if self.assets:
+      end = PATH_PATTERN.match(path).end()
+      path = self.assets.get(path[:end], path[:end]) + path[end:]
+    return self.static_prefix + path
+
+  def href(self, url):
+    if url.startswith("/static/"):
+      return self.static(url[len("/static/"):])
+    if url.startswith("/"):
+      return self.page_prefix + url[1:]
+    if url.startswith("static/"):
+      return self.static(url[len("static/"):])
+    return url
+
+  def src(self, url):
+    if url.startswith("/"):
+      return self.static(url[1:])
+    return url
+
+  def attribute(self, name, url):
+    return self.src(url) if name == "src" else self.href(url)
+
+current = None
+
+def resolver_for(basepath, assets=None):
+  # Rebuilt only when the basepath or the asset map changes
+  global current
+  if current is None or current[0] != basepath or current[1] is not assets:
+    current = (basepath, assets, UrlResolver(root_folder_for(basepath), assets))
+  return current[2]
@@ -0,0 +1,157 @@
+import functools
+import os
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import config
+import profiler
+from page_generator import generate_page
+from site_builder import remove_output
+from snapshot import take_snapshot
+from static_sync import copy_file
+from template import load_template
+
+
+def diff_snapshots(old, new):
+  changed = [path for path, signature in new.items() if old.get(path) != signature]
+  removed = [path for path in old if path not in new]
+  return changed, removed
+
+
+class WatchStats:
+  def __init__(self):
+    self.generated = 0
+    self.copied = 0
+    self.removed = 0
+    self.errors = []
+    self.elapsed = 0.0
+
+  def summary(self):
+    return (f"Rebuilt {self.generated} page(s), copied {self.copied} static file(s), "
+            f"removed {self.removed} output(s) in {self.elapsed * 1000:.1f} ms" +
+            (f", {len(self.errors)} file(s) failed" if self.errors else ""))
+
+
+class SiteWatcher:
+  def __init__(self, content_dir, static_dir, template_path, dest_dir, body_cache=None, minify=False):
+    self.content_dir = content_dir
+    self.static_dir = static_dir
+    self.template_path = template_path
+    self.dest_dir = dest_dir
+    self.static_dest_dir = os.path.join(dest_dir, "static")
+    self.body_cache = body_cache
+    self.minify = minify
+    self.template = load_template(template_path, config.basepath, minify=minify)
+    self.snapshot = self.take_snapshot()
+
+  def take_snapshot(self):
+    return take_snapshot([self.content_dir, self.static_dir, self.template_path])
+
+  def page_dest_path(self, source_path):
+    relative = os.path.relpath(source_path, self.content_dir)
+    name_without_ext, _ = os.path.splitext(relative)
+    return os.path.join(self.dest_dir, name_without_ext + ".html")
+
+  def static_dest_path(self, source_path):
+    return os.path.join(self.static_dest_dir, os.path.relpath(source_path, self.static_dir))
+
+  def is_page(self, path):
+    return path.startswith(self.content_dir + os.sep)
+
+  def render(self, source_path, stats):
+    try:
+      generate_page(source_path, self.template_path, self.page_dest_path(source_path), self.template,
+                    self.body_cache)
+      stats.generated += 1
+    except Exception as e:
+      stats.errors.append((source_path, f"{type(e).__name__}: {e}"))
+
+  def copy(self, source_path, stats):
+    # The file may be gone again by now, which is reported rather than fatal
+    try:
+      copy_file(source_path, self.static_dest_path(source_path))
+      stats.copied += 1
+    except OSError as e:
+      stats.errors.append((source_path, f"{type(e).__name__}: {e}"))
+
+  def poll(self):
+    new_snapshot = self.take_snapshot()
+    changed, removed = diff_snapshots(self.snapshot, new_snapshot)
+    if not changed and not removed:
+      return None
+
+    start = time.perf_counter()
+    stats = WatchStats()
+    self.snapshot = new_snapshot
+    if self.template_path in changed:
+      # Every page embeds the template, so re-render all of them along with
+      # the other files that changed
+      self.template = load_template(self.template_path, config.basepath, minify=self.minify)
+      changed = ([path for path in new_snapshot if self.is_page(path)] +
+                 [path for path in changed if not self.is_page(path)])
+
+    for path in changed:
+      if self.is_page(path):
+        self.render(path, stats)
+      elif path != self.template_path:
+        self.copy(path, stats)
+
+    for path in removed:
+      if path == self.template_path:
+        continue
+      dest_path = self.page_dest_path(path) if self.is_page(path) else self.static_dest_path(path)
+      remove_output(dest_path, self.dest_dir)
+      stats.removed += 1
+
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+  def watch(self, interval=0.2):
+    while True:
+      stats = self.poll()
+      if stats is not None:
+        print(stats.summary())
+        for source_path, error in stats.errors:
+          print(f"Failed to update {source_path}: {error}")
+        if profiler.enabled:
+          print(profiler.summary(profiler.take_profiles(), top=3))
+      time.sleep(interval)
+
+
+class SiteRequestHandler(SimpleHTTPRequestHandler):
+  # Serves docs/ under the root folder its pages link to (e.g. /static-site-generator/)
+  def __init__(self, *args, root_folder="", **kwargs):
+    # Set before the base class handles the request from its constructor
+    self.root_folder = root_folder
+    super().__init__(*args, **kwargs)
+
+  def in_root_folder(self):
+    path = urlsplit(self.path).path
+    return path == self.root_folder or path.startswith(self.root_folder + "/")
+
+  def do_GET(self):
+    if not self.in_root_folder():
+      self.send_error(404)
+      return
+    super().do_GET()
+
+  def do_HEAD(self):
+    if not self.in_root_folder():
+      self.send_error(404)
+      return
+    super().do_HEAD()
+
+  def translate_path(self, path):
+    # self.path keeps the prefix, so directory redirects stay under the root folder
+    return super().translate_path(path[len(self.root_folder):])
+
+
+def start_server(directory, port, root_folder=""):
+  handler = functools.partial(SiteRequestHandler, directory=directory, root_folder=root_folder)
+  server = ThreadingHTTPServer(("", port), handler)
+  thread = threading.Thread(target=server.serve_forever, daemon=True)
+  thread.start()
+  print(f"Serving {directory} at http://localhost:{server.server_address[1]}{root_folder}/")
+  return server